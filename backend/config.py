@@ -7,6 +7,23 @@ class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./data/transcriptions.db")
     AUDIO_STORAGE_PATH: str = os.getenv("AUDIO_STORAGE_PATH", "audio_storage")
     WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "tiny")
+    # 0 sizes model instances to available memory and splits the CPUs between them
+    MODEL_WORKERS: int = int(os.getenv("MODEL_WORKERS", "0"))
+    MODEL_THREADS: int = int(os.getenv("MODEL_THREADS", "0"))
+    # Model instances kept free from batches for live transcription, when there are 2+
+    LIVE_RESERVED_MODELS: int = int(os.getenv("LIVE_RESERVED_MODELS", "1"))
+    # 0 estimates the memory of one model instance from WHISPER_MODEL
+    MODEL_MEMORY_MB: int = int(os.getenv("MODEL_MEMORY_MB", "0"))
+    STREAM_WINDOW_SECONDS: int = int(os.getenv("STREAM_WINDOW_SECONDS", "30"))
+    LIVE_STEP_SECONDS: float = float(os.getenv("LIVE_STEP_SECONDS", "1"))
+    GZIP_MINIMUM_SIZE: int = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+    SEMANTIC_SEARCH: bool = os.getenv("SEMANTIC_SEARCH", "false").lower() == "true"
+    EMBEDDING_MODEL: str = os.getenv(
+        "EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+    )
+    SEMANTIC_CHUNK_WORDS: int = int(os.getenv("SEMANTIC_CHUNK_WORDS", "120"))
+    SEMANTIC_IVF_PROBES: int = int(os.getenv("SEMANTIC_IVF_PROBES", "32"))
+    VECTOR_INDEX_PATH: str = os.getenv("VECTOR_INDEX_PATH", "data/vector_index")
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "DEBUG")
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
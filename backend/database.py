@@ -1,13 +1,30 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String, Text, create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Engine,
+    Integer,
+    LargeBinary,
+    String,
+    create_engine,
+    inspect,
+)
+from sqlalchemy import text as sql_text
+from sqlalchemy.orm import declarative_base, deferred, sessionmaker
 
 from config import settings
+from utils.compression import (
+    compress_text,
+    decompress_text,
+    make_preview,
+    register_dictionary,
+)
 
 engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+MIGRATION_BATCH_SIZE = 2000  # transcripts compressed per transaction by migrations
 
 
 class Transcription(Base):
@@ -18,18 +35,119 @@ class Transcription(Base):
         - audio file path will be made unique with batch_uuid that is generated per upload
         - original audio file name that is uploaded by the user will be preserved
             - This will then be displayed and used for search.
+        - transcribed text is stored zstd compressed in a deferred column, so that
+            listing queries only read the short preview column
+            - text property compresses / decompresses it, see backend/utils/compression.py
     """
 
     __tablename__ = "transcriptions"
     id = Column(Integer, primary_key=True, index=True)
     audio_filepath = Column(String, index=True)
     original_audio_filename = Column(String, index=True)
-    text = Column(Text)
+    preview = Column(String)
+    text_zstd = deferred(Column(LargeBinary))
     created_at = Column(DateTime, default=datetime.now().astimezone())
 
+    @property
+    def text(self) -> str | None:
+        if self.text_zstd is None:
+            return None
+        return decompress_text(self.text_zstd, load_compression_dictionary)
+
+    @text.setter
+    def text(self, value: str | None) -> None:
+        self.text_zstd = None if value is None else compress_text(value)
+        self.preview = None if value is None else make_preview(value)
+
+
+class CompressionDictionary(Base):
+    """
+    Shared zstd dictionaries used to compress transcripts, keyed by the dictionary id
+    that zstd writes into every compressed frame. Dictionaries are never deleted so that
+    older transcripts stay readable after a new dictionary is trained.
+    """
+
+    __tablename__ = "compression_dictionaries"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    data = Column(LargeBinary)
+    created_at = Column(DateTime, default=datetime.now)
+
+
+def load_compression_dictionary(dictionary_id: int) -> bytes | None:
+    """Fetch a dictionary trained by another process, e.g. the bulk importer."""
+    with SessionLocal() as db:
+        dictionary = db.get(CompressionDictionary, dictionary_id)
+        return dictionary.data if dictionary else None
+
+
+def migrate_plain_text_column(
+    bind: Engine = engine, batch_size: int = MIGRATION_BATCH_SIZE
+) -> None:
+    """
+    Databases created before transcripts were compressed have a plain `text` column,
+    add the compressed columns and move existing transcripts over.
+    - Transcripts are moved in id ordered batches of batch_size, each in its own
+        transaction, so that a large archive is never held in memory at once and an
+        interrupted migration resumes where it stopped
+    - The plain column is then dropped and the file vacuumed, so that the space of the
+        plain transcripts is given back
+    """
+    columns = {column["name"] for column in inspect(bind).get_columns("transcriptions")}
+    if "text" not in columns:
+        return
+    if "text_zstd" not in columns:
+        with bind.begin() as connection:
+            connection.execute(
+                sql_text("ALTER TABLE transcriptions ADD COLUMN preview VARCHAR")
+            )
+            connection.execute(
+                sql_text("ALTER TABLE transcriptions ADD COLUMN text_zstd BLOB")
+            )
+
+    last_id = -1
+    while True:
+        with bind.begin() as connection:
+            rows = connection.execute(
+                sql_text(
+                    "SELECT id, text FROM transcriptions WHERE id > :last_id "
+                    "AND text IS NOT NULL AND text_zstd IS NULL "
+                    "ORDER BY id LIMIT :batch_size"
+                ),
+                {"last_id": last_id, "batch_size": batch_size},
+            ).all()
+            if not rows:
+                break
+            connection.execute(
+                sql_text(
+                    "UPDATE transcriptions SET preview = :preview, "
+                    "text_zstd = :text_zstd WHERE id = :id"
+                ),
+                [
+                    {
+                        "id": transcription_id,
+                        "preview": make_preview(plain_text),
+                        "text_zstd": compress_text(plain_text),
+                    }
+                    for transcription_id, plain_text in rows
+                ],
+            )
+        last_id = rows[-1][0]
+
+    with bind.begin() as connection:
+        connection.execute(sql_text("ALTER TABLE transcriptions DROP COLUMN text"))
+    # VACUUM cannot run inside a transaction
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(sql_text("VACUUM"))
+
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    migrate_plain_text_column()
+    with SessionLocal() as db:
+        for dictionary in db.query(CompressionDictionary).order_by(
+            CompressionDictionary.created_at
+        ):
+            register_dictionary(dictionary.data)
 
 
 def get_db():
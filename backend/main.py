@@ -1,3 +1,9 @@
+from utils.worker_runtime import configure_worker_runtime
+
+# Before the routes import numpy, and later torch, so that their OpenMP / BLAS runtimes
+# pick up the thread counts when they are loaded
+configure_worker_runtime()
+
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -8,6 +14,7 @@ from config import settings
 from database import init_db
 from log_config import logger
 from routes import health, transcriptions, websocket
+from utils.responses import TranscriptionGZipMiddleware
 from utils.websocket_manager import clear_websockets
 
 app = FastAPI()
@@ -19,6 +26,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Large transcription listings are compressed for clients that accept gzip
+app.add_middleware(TranscriptionGZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
 
 
 @asynccontextmanager
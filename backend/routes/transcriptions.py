@@ -1,4 +1,4 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
 from fastapi import (
     APIRouter,
@@ -9,16 +9,22 @@ from fastapi import (
     Query,
     UploadFile,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
+from config import settings
 from database import get_db
 from log_config import logger
 from utils.db_operations import (
-    db_get_transcriptions,
-    db_search_transcriptions,
+    db_get_transcription,
+    db_get_transcription_rows,
+    db_get_transcription_rows_by_ids,
+    db_search_transcription_rows,
 )
-from utils.transcriber import transcribe_files
+from utils.responses import ORJSONResponse, transcription_rows_response
+from utils.semantic_search import hybrid_rank, semantic_search
+from utils.transcriber import SUPPORTED_AUDIO_EXTENSIONS, transcribe_files
 
 router = APIRouter(prefix="/api", tags=["transcriptions"])
 
@@ -43,7 +49,7 @@ async def transcribe(
             informs the frontend on which batch of audio files (one or many) has completed processing.
             - More information in backend/routes/websocket.py
     """
-    if not all(file.filename.endswith((".wav", ".mp3", ".m4a")) for file in files):
+    if not all(file.filename.endswith(SUPPORTED_AUDIO_EXTENSIONS) for file in files):
         logger.error("Unsupported file format")
         raise HTTPException(status_code=400, detail="Unsupported file format")
 
@@ -60,7 +66,7 @@ async def transcribe(
 
 
 @router.get("/transcriptions")
-async def get_transcriptions(db: Session = Depends(get_db)) -> JSONResponse:
+async def get_transcriptions(db: Session = Depends(get_db)) -> ORJSONResponse:
     """
     - Task 2a iii:
     - GET /transcriptions: Retrieves all transcriptions from the database.
@@ -70,34 +76,57 @@ async def get_transcriptions(db: Session = Depends(get_db)) -> JSONResponse:
             - Transcription's audio_filepath - this can be used for frontend to hear the uploaded audio file
                 - Mounting of audio_storage folder (which stores the audio files) is done in backend/main.py
             - Original Audio Filename - original audio filename when uploaded by the user
-            - transcript output of whisper that is saved
+            - preview of the transcript output of whisper that is saved
+                - full transcript is fetched per transcription from GET /transcriptions/{id}
             - transcript creation datetime
     """
-    transcriptions = db_get_transcriptions(db=db)
-    return JSONResponse(
-        content=[
-            {
-                "id": transcription.id,
-                "audio_filepath": f"{transcription.audio_filepath}",
-                "original_audio_filename": transcription.original_audio_filename,
-                "text": transcription.text,
-                "created_at": transcription.created_at.isoformat(),
-            }
-            for transcription in transcriptions
-        ],
+    return transcription_rows_response(db_get_transcription_rows(db=db))
+
+
+@router.get("/transcriptions/{transcription_id}")
+async def get_transcription(
+    transcription_id: int, db: Session = Depends(get_db)
+) -> ORJSONResponse:
+    """
+    - GET /transcriptions/{id}: Retrieves a single transcription with its full text.
+    - Assumptions:
+        - Listings only return a preview of each transcript, as full transcripts are
+            stored compressed and only decompressed when requested here
+    """
+    transcription = db_get_transcription(transcription_id, db=db)
+    if transcription is None:
+        raise HTTPException(status_code=404, detail="Transcription not found")
+    return ORJSONResponse(
+        content={
+            "id": transcription.id,
+            "audio_filepath": f"{transcription.audio_filepath}",
+            "original_audio_filename": transcription.original_audio_filename,
+            "text": transcription.text,
+            "created_at": transcription.created_at.isoformat(),
+        },
         status_code=200,
     )
 
 
 @router.get("/search")
-async def search(
-    file_name: str,
+async def search(  # noqa: PLR0913, PLR0917 query parameters of the endpoint
+    file_name: str | None = None,
     match_full_file_name: Annotated[
         bool, Query(description="Match full file name only")
     ] = False,
     match_case: Annotated[bool, Query(description="Match case sensitive")] = False,
+    mode: Annotated[
+        Literal["keyword", "semantic", "hybrid"],
+        Query(description="Match file names, transcript meaning, or both"),
+    ] = "keyword",
+    q: Annotated[
+        str | None, Query(description="Free text query for semantic and hybrid modes")
+    ] = None,
+    limit: Annotated[
+        int, Query(ge=1, le=500, description="Maximum semantic and hybrid results")
+    ] = 50,
     db: Session = Depends(get_db),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     - Task 2a iv:
     - GET /search: Performs a full-text search on transcriptions based on audio file name.
@@ -105,20 +134,34 @@ async def search(
         - Search Based on the file name only
         - Allow for exact full file name and/or case sensitive searches
         - Returns matching transcription in the same format as Task 2a iii.
+    - Semantic search, when settings.SEMANTIC_SEARCH is enabled:
+        - mode=semantic: q is a free text query, and the transcriptions whose transcript
+            chunks are closest in meaning are returned, best first
+        - mode=hybrid: the file_name search, when file_name is given, and the semantic
+            search for q are merged with reciprocal rank fusion, keeping the best `limit`
+        - More information in backend/utils/semantic_search.py
     """
-    transcriptions = db_search_transcriptions(
-        file_name, match_full_file_name, match_case, db=db
-    )
-    return JSONResponse(
-        content=[
-            {
-                "id": transcription.id,
-                "audio_filepath": f"{transcription.audio_filepath}",
-                "original_audio_filename": transcription.original_audio_filename,
-                "text": transcription.text,
-                "created_at": transcription.created_at.isoformat(),
-            }
-            for transcription in transcriptions
-        ],
-        status_code=200,
+    if mode == "keyword" and file_name is None:
+        raise HTTPException(status_code=400, detail="file_name is required")
+    if mode != "keyword" and not q:
+        raise HTTPException(status_code=400, detail=f"q is required for {mode} search")
+
+    keyword_rows = []
+    if file_name is not None and mode != "semantic":
+        keyword_rows = db_search_transcription_rows(
+            file_name, match_full_file_name, match_case, db=db
+        )
+    if mode == "keyword":
+        return transcription_rows_response(keyword_rows)
+
+    if not settings.SEMANTIC_SEARCH:
+        raise HTTPException(status_code=400, detail="Semantic search is not enabled")
+    semantic_ids = await run_in_threadpool(semantic_search, q, limit)
+    if mode == "hybrid":
+        ranked_ids = hybrid_rank([row[0] for row in keyword_rows], semantic_ids)[:limit]
+        return transcription_rows_response(
+            db_get_transcription_rows_by_ids(ranked_ids, db=db)
+        )
+    return transcription_rows_response(
+        db_get_transcription_rows_by_ids(semantic_ids, db=db)
     )
@@ -1,10 +1,23 @@
+import os
+import uuid
+import wave
+
 from fastapi import (
     APIRouter,
+    Depends,
     WebSocket,
     WebSocketDisconnect,
 )
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
 
+from config import settings
+from database import get_db
 from log_config import logger
+from utils.db_operations import db_save_transcription
+from utils.live_transcriber import BYTES_PER_SAMPLE, LiveTranscriber
+from utils.semantic_search import index_saved_transcriptions
+from utils.transcriber import SAMPLE_RATE
 from utils.websocket_manager import add_websocket, remove_websocket
 
 router = APIRouter(prefix="/ws", tags=["websocket"])
@@ -19,6 +32,8 @@ async def websocket_endpoint(websocket: WebSocket, batch_uuid: str):
     - Websocket endpoint that accepts a batch uuid
     - Keeps the websocket alive until all audio files in a batch
         (can be 1 or many audio files) processing is completed
+    - Partial text of each audio file is pushed as it is decoded, see
+        backend/utils/transcriber.py > process_transcription_batch function
     """
     await websocket.accept()
     add_websocket(batch_uuid, websocket)  # Add the new websocket connection
@@ -38,3 +53,87 @@ async def websocket_endpoint(websocket: WebSocket, batch_uuid: str):
             await websocket.close()
         except RuntimeError:
             logger.info("WebSocket already closed.")
+
+
+@router.websocket("/live_transcribe")
+async def live_transcribe_endpoint(
+    websocket: WebSocket,
+    file_name: str = "live_recording.wav",
+    db: Session = Depends(get_db),
+):
+    """
+    Live microphone transcription
+    - Client streams binary frames of 16 kHz mono 16-bit little-endian PCM audio
+    - Partial text is sent back as the audio is decoded, see
+        backend/utils/live_transcriber.py > LiveTranscriber
+        - Status = partial, with the transcript so far
+        - Decoding runs in the background, receiving audio never waits for it
+    - Client sends the text message "end" once the recording is over
+        - Remaining audio is decoded, the transcript is saved to the database and the
+            recording is saved as a wav file in audio_storage for playback
+        - Status = final, with the id and full text of the saved transcription
+    - Assumptions:
+        - Audio is expected to be resampled to raw PCM by the client, Opus frames are not
+            decoded as that would need another native dependency
+    """
+    await websocket.accept()
+    sequence = 0
+
+    async def send_partial(text: str) -> None:
+        nonlocal sequence
+        sequence += 1
+        await websocket.send_json(
+            {"status": "partial", "sequence": sequence, "text": text}
+        )
+
+    transcriber = LiveTranscriber(on_update=send_partial)
+    audio_path = os.path.join(
+        settings.AUDIO_STORAGE_PATH, f"{uuid.uuid4()}_{os.path.basename(file_name)}"
+    )
+    recording = wave.open(audio_path, "wb")  # noqa: SIM115 closed in finally
+    recording.setnchannels(1)
+    recording.setsampwidth(BYTES_PER_SAMPLE)
+    recording.setframerate(SAMPLE_RATE)
+    saved = False
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                logger.info(
+                    "Live transcription WebSocket disconnected before the end message"
+                )
+                return
+            if message.get("bytes"):
+                recording.writeframes(message["bytes"])
+                await transcriber.feed(message["bytes"])
+            elif message.get("text") == "end":
+                break
+
+        recording.close()
+        text = await transcriber.finish()
+        transcription = db_save_transcription(audio_path, file_name, text, db)
+        saved = True
+        await run_in_threadpool(index_saved_transcriptions, [(transcription.id, text)])
+        sequence += 1
+        await websocket.send_json(
+            {
+                "status": "final",
+                "sequence": sequence,
+                "id": transcription.id,
+                "text": text,
+            }
+        )
+    except WebSocketDisconnect:
+        logger.info("WebSocket disconnected")
+    except Exception as e:
+        logger.error(f"Error in live transcription WebSocket: {e}")
+    finally:
+        transcriber.cancel()
+        recording.close()
+        if not saved:
+            # Recordings without a saved transcript are not kept in audio_storage
+            os.remove(audio_path)
+        try:
+            await websocket.close()
+        except RuntimeError:
+            logger.info("WebSocket already closed.")
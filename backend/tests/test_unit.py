@@ -1,17 +1,47 @@
 import asyncio
+import os
+import subprocess
+import sys
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
+import numpy as np
 import pytest
-from sqlalchemy import create_engine
+import zstandard
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy import text as sql_text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from config import settings
-from database import Base, Transcription
-from utils import db_operations, transcriber
+from database import (
+    Base,
+    CompressionDictionary,
+    Transcription,
+    get_db,
+    migrate_plain_text_column,
+)
+from routes import transcriptions, websocket
+from utils import (
+    bulk_import,
+    compression,
+    db_operations,
+    responses,
+    semantic_search,
+    transcriber,
+)
+from utils.live_transcriber import BYTES_PER_SAMPLE, LiveTranscriber, PcmRingBuffer
 from utils.websocket_manager import (
     add_websocket,
     clear_websockets,
     remove_websocket,
 )
+from utils.worker_runtime import ModelPool, plan_workers
 
 """
 Task 4a: Testing for Backend
@@ -28,10 +58,49 @@ Task 4a: Testing for Backend
 - Transcription Tests (transcriber.py)
     - Tests that the transcription function returns expected text using a mocked model.
     - Validates the asynchronous batch processing of audio files and tracks websocket messages.
+    - Validates that partial window results are streamed with a monotonic sequence number.
+    - Checks that windows restart at the last complete segment, with the previous text
+        as prompt and the detected language kept.
+
+- Bulk Import Tests (bulk_import.py)
+    - Imports a directory of audio files and verifies that a resumed run skips them.
+    - Checks that a file failing to transcribe is recorded and skipped, without stopping
+        the import of the other files.
+    - Checks that only a bounded window of files is queued for transcription.
+    - Checks that a dictionary can be trained without a directory or manifest to import.
+
+- Live Transcription Tests (live_transcriber.py and routes/websocket.py)
+    - Checks the ring buffer ordering once writes wrap around.
+    - Checks that the live window slides on segment boundaries without losing or
+        repeating words, and that decodes run one at a time on the newest audio.
+    - Replays a wav file into the live transcription websocket and checks the partial and
+        final messages, and the saved transcription.
+
+- Semantic Search Tests (semantic_search.py)
+    - Checks that the flat vector index returns the best transcriptions across batches.
+    - Indexes transcripts at save time with a dummy embedding model and runs semantic and
+        hybrid searches through GET /search.
+    - Checks that indexing errors do not stop a batch, and that the transcripts left out
+        are indexed by the reindex command.
+
+- Worker Runtime Tests (worker_runtime.py)
+    - Checks that model instances are sized to memory and CPUs are split between them.
+    - Checks that the app pins the BLAS thread counts before numpy is imported.
+    - Checks that the model pool never creates more instances than its size, and that
+        threads wait for a pooled instance to be released.
+    - Checks that instances are reserved for live transcription, and that live partial
+        decodes are skipped rather than queued when no instance is free.
 
 - Database Operation Tests (db_operations.py)
     - Confirms that transcription records can be saved and retrieved correctly.
     - Tests search functionality for partial and full filename matches, including case sensitivity.
+    - Checks that transcripts are stored compressed, listings only load the preview and the
+        full text is served per id, with and without a trained shared dictionary.
+    - Checks that dictionary training is skipped on too few transcripts, and that
+        databases with plain transcripts are migrated and shrunk.
+    - Checks that listing rows selected with Core match the ORM entities and are
+        served with ISO formatted timestamps.
+    - Checks that gzip compression only applies to the transcription JSON responses.
 """
 
 
@@ -46,6 +115,9 @@ def test_engine():
     engine = create_engine(
         settings.DATABASE_URL,
         connect_args={"check_same_thread": False},
+        # Share one connection so websocket tests running in another thread see the
+        # same in-memory database.
+        poolclass=StaticPool,
     )
     yield engine
     engine.dispose()
@@ -69,11 +141,20 @@ def db_session(test_engine):
     test_session = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
     session = test_session()
     session.query(Transcription).delete()
+    session.query(CompressionDictionary).delete()
     session.commit()
     yield session
     session.close()
 
 
+@pytest.fixture(autouse=True)
+def model_pool(monkeypatch):
+    """
+    Give each test an empty model pool, so that it loads its own models.
+    """
+    monkeypatch.setattr(transcriber, "model_pool", transcriber.create_model_pool())
+
+
 # -------------------------------
 # Dummy Test Helpers
 # -------------------------------
@@ -89,6 +170,13 @@ def dummy_model():
     return Dummy()
 
 
+def dummy_load_audio(file_path: str):  # noqa: ARG001 Keep the signature for compatibility with the real loader.
+    """
+    Return a silent 1 second waveform in place of decoding the audio file.
+    """
+    return [0.0] * transcriber.SAMPLE_RATE
+
+
 class DummyWebSocket:
     """
     A dummy websocket for collecting sent messages in tests.
@@ -131,8 +219,9 @@ async def test_process_transcription_batch(db_session, monkeypatch):
     """
     clear_websockets()
 
-    # Monkey-patch get_model to return a dummy model.
-    monkeypatch.setattr("utils.transcriber.get_model", lambda: dummy_model())
+    # Monkey-patch load_model so that the model pool holds dummy models.
+    monkeypatch.setattr("utils.transcriber.load_model", lambda: dummy_model())
+    monkeypatch.setattr("utils.transcriber.load_audio", dummy_load_audio)
 
     # Use dummy websocket for a given batch_uuid.
     batch_uuid = "test_batch"
@@ -152,7 +241,7 @@ async def test_process_transcription_batch(db_session, monkeypatch):
     await asyncio.sleep(0)
 
     # Verify that records have been inserted (should be 2 new records).
-    records = db_operations.db_get_transcriptions(db_session)
+    records = db_session.query(Transcription).all()
     assert len(records) == 2
 
     # Verify dummy websocket received messages.
@@ -174,6 +263,686 @@ async def test_process_transcription_batch(db_session, monkeypatch):
     remove_websocket(batch_uuid, dummy_ws)
 
 
+@pytest.mark.asyncio
+async def test_process_transcription_batch_streams_partials(db_session, monkeypatch):
+    """
+    Verify that each decoded window is sent as a partial message before the file's
+    consolidated completed message, with sequence numbers increasing across the batch.
+    """
+    clear_websockets()
+
+    class WindowModel:
+        def transcribe(self, audio, **options):  # noqa: ARG002 Keep the signature for compatibility with the real model.
+            return {"text": f" {len(audio)}"}
+
+    # 2.5 seconds of audio split into 1 second windows.
+    monkeypatch.setattr("utils.transcriber.load_model", WindowModel)
+    monkeypatch.setattr(
+        "utils.transcriber.load_audio",
+        lambda _: [0.0] * int(2.5 * transcriber.SAMPLE_RATE),
+    )
+    monkeypatch.setattr(settings, "STREAM_WINDOW_SECONDS", 1)
+
+    batch_uuid = "test_stream_batch"
+    dummy_ws = DummyWebSocket()
+    add_websocket(batch_uuid, dummy_ws)
+
+    await transcriber.process_transcription_batch(
+        batch_uuid, ["audio/long.mp3"], ["long.mp3"], db_session
+    )
+
+    msgs = dummy_ws.sent_messages
+    assert [msg["status"] for msg in msgs] == [
+        "partial",
+        "partial",
+        "partial",
+        "completed",
+        "job_completed",
+    ]
+    assert [msg["sequence"] for msg in msgs[:4]] == [1, 2, 3, 4]
+    assert [msg["text"] for msg in msgs[:3]] == [" 16000", " 16000", " 8000"]
+    assert msgs[3]["text"] == " 16000 16000 8000"
+
+    records = db_session.query(Transcription).all()
+    assert records[0].text == " 16000 16000 8000"
+
+    remove_websocket(batch_uuid, dummy_ws)
+
+
+def test_iter_transcribe_windows_aligns_on_segments(monkeypatch):
+    """
+    Verify that a window's last, possibly cut, segment is decoded again at the start of
+    the next window, with the transcript so far as prompt and the first detected
+    language kept.
+    """
+    calls = []
+
+    class SegmentModel:
+        def transcribe(self, audio, **options):
+            calls.append((len(audio), options))
+            seconds = len(audio) / transcriber.SAMPLE_RATE
+            segments = [
+                {"start": 0.0, "end": 0.75, "text": " first"},
+                {"start": 0.75, "end": seconds, "text": " cut"},
+            ]
+            text = "".join(segment["text"] for segment in segments)
+            return {"text": text, "segments": segments, "language": "en"}
+
+    monkeypatch.setattr(
+        "utils.transcriber.load_audio",
+        lambda _: [0.0] * int(2 * transcriber.SAMPLE_RATE),
+    )
+    monkeypatch.setattr(settings, "STREAM_WINDOW_SECONDS", 1)
+
+    texts = list(transcriber.iter_transcribe_windows("audio/long.mp3", SegmentModel()))
+
+    # Windows start at 0, 0.75 and 1.5 seconds, the last one runs to the end of the file.
+    assert [length for length, _ in calls] == [16000, 16000, 8000]
+    assert texts == [" first", " first", " first cut"]
+    assert calls[0][1] == {}
+    assert calls[2][1] == {"initial_prompt": " first first", "language": "en"}
+
+
+# -------------------------------
+# Tests for bulk_import.py
+# -------------------------------
+def test_run_bulk_import_resumes(db_session, monkeypatch, tmp_path):
+    """
+    Import a directory of audio files, then verify that a second run imports nothing
+    because every file is already checkpointed and saved to the database.
+    """
+    monkeypatch.setattr("utils.transcriber.get_model", lambda: dummy_model())
+    storage_path = tmp_path / "audio_storage"
+    storage_path.mkdir()
+    monkeypatch.setattr(settings, "AUDIO_STORAGE_PATH", str(storage_path))
+
+    archive_path = tmp_path / "archive" / "nested"
+    archive_path.mkdir(parents=True)
+    for name in ["a.mp3", "b.wav", "c.m4a", "notes.txt"]:
+        (archive_path / name).write_bytes(b"audio")
+    checkpoint_path = str(tmp_path / "bulk_import.checkpoint")
+
+    source_paths = list(bulk_import.iter_audio_files(str(tmp_path / "archive")))
+    assert len(source_paths) == 3
+
+    imported = bulk_import.run_bulk_import(
+        source_paths,
+        db_session,
+        workers=1,
+        batch_size=2,
+        checkpoint_path=checkpoint_path,
+    )
+    assert imported == 3
+    records = db_session.query(Transcription).all()
+    assert {record.original_audio_filename for record in records} == {
+        "a.mp3",
+        "b.wav",
+        "c.m4a",
+    }
+    assert all(os.path.exists(record.audio_filepath) for record in records)
+    assert bulk_import.load_checkpoint(checkpoint_path) == set(source_paths)
+
+    # A crash after the commit but before the checkpoint must still be skipped.
+    os.remove(checkpoint_path)
+    imported = bulk_import.run_bulk_import(
+        source_paths, db_session, workers=1, checkpoint_path=checkpoint_path
+    )
+    assert imported == 0
+    assert len(db_session.query(Transcription).all()) == 3
+
+
+def test_run_bulk_import_skips_failed_files(db_session, monkeypatch, tmp_path):
+    """
+    Verify that a file failing to transcribe is recorded in the failures file while the
+    rest of the archive is imported, and that it is only retried when asked to.
+    """
+
+    class FailingModel:
+        def transcribe(self, file_path: str):
+            if file_path.endswith("b.mp3"):
+                msg = "corrupt recording"
+                raise RuntimeError(msg)
+            return {"text": "dummy transcribed text"}
+
+    monkeypatch.setattr("utils.transcriber.get_model", FailingModel)
+    storage_path = tmp_path / "audio_storage"
+    storage_path.mkdir()
+    monkeypatch.setattr(settings, "AUDIO_STORAGE_PATH", str(storage_path))
+    source_paths = []
+    for name in ["a.mp3", "b.mp3", "c.mp3"]:
+        (tmp_path / name).write_bytes(b"audio")
+        source_paths.append(str(tmp_path / name))
+    checkpoint_path = str(tmp_path / "bulk_import.checkpoint")
+
+    imported = bulk_import.run_bulk_import(
+        source_paths, db_session, workers=1, checkpoint_path=checkpoint_path
+    )
+    assert imported == 2
+    assert bulk_import.load_checkpoint(checkpoint_path) == {
+        source_paths[0],
+        source_paths[2],
+    }
+    failures_path = bulk_import.failures_path_for(checkpoint_path)
+    assert bulk_import.load_checkpoint(failures_path) == {source_paths[1]}
+
+    # The failed file is skipped on resume, and imported once retried.
+    imported = bulk_import.run_bulk_import(
+        source_paths, db_session, workers=1, checkpoint_path=checkpoint_path
+    )
+    assert imported == 0
+    monkeypatch.setattr("utils.transcriber.get_model", lambda: dummy_model())
+    imported = bulk_import.run_bulk_import(
+        source_paths,
+        db_session,
+        workers=1,
+        checkpoint_path=checkpoint_path,
+        retry_failed=True,
+    )
+    assert imported == 1
+
+
+def test_iter_pool_results_bounds_queued_files(monkeypatch):
+    """
+    Verify that only a window of files is queued on the executor, so that stopping after
+    the first result leaves the rest of the archive untranscribed.
+    """
+    transcribed = []
+
+    def record_transcription(file_path: str) -> str:
+        transcribed.append(file_path)
+        return "dummy transcribed text"
+
+    monkeypatch.setattr(bulk_import, "transcribe_audio", record_transcription)
+    pending = [f"audio/{i}.mp3" for i in range(40)]
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = bulk_import.iter_pool_results(executor, pending, window=4)
+        assert next(results) == ("dummy transcribed text", None)
+        executor.shutdown(cancel_futures=True)
+    assert transcribed[0] == "audio/0.mp3"
+    assert len(transcribed) <= 5
+
+
+def test_bulk_import_trains_dictionary_without_source(db_session, monkeypatch):
+    """
+    Verify that --train-dictionary runs on its own, without a directory or manifest to
+    import, and that a source is still required otherwise.
+    """
+    trained = []
+    monkeypatch.setattr(bulk_import, "init_db", lambda: None)
+    monkeypatch.setattr(bulk_import, "SessionLocal", lambda: db_session)
+    monkeypatch.setattr(
+        bulk_import, "db_train_compression_dictionary", lambda db: trained.append(db)
+    )
+    monkeypatch.delattr(bulk_import, "run_bulk_import")
+
+    bulk_import.main(["--train-dictionary"])
+    assert trained == [db_session]
+    with pytest.raises(SystemExit):
+        bulk_import.main([])
+
+
+# -------------------------------
+# Tests for live_transcriber.py and routes/websocket.py
+# -------------------------------
+def test_pcm_ring_buffer_wraps():
+    """
+    Verify that the ring buffer keeps the most recent bytes in chronological order, and
+    that discarding the oldest bytes lets writes wrap around.
+    """
+    ring = PcmRingBuffer(4)
+    assert ring.write(b"ab") == 0
+    assert ring.write(b"cd") == 0
+    assert ring.read() == b"abcd"
+    assert ring.write(b"ef") == 2
+    assert ring.read() == b"cdef"
+    assert ring.free() == 0
+    ring.discard(3)
+    assert ring.write(b"gh") == 0
+    assert ring.read() == b"fgh"
+
+
+def frame_model(calls: list):
+    """
+    Create a dummy model for PCM frames filled with their frame number, returning one
+    segment per 0.25 second frame with that number as text, so that lost or duplicated
+    audio shows up in the transcript.
+    """
+    frame_bytes = transcriber.SAMPLE_RATE // 4 * BYTES_PER_SAMPLE
+    bytes_per_second = transcriber.SAMPLE_RATE * BYTES_PER_SAMPLE
+
+    class FrameModel:
+        def transcribe(self, audio, **options):
+            calls.append((len(audio), dict(options)))
+            segments = [
+                {
+                    "start": offset / bytes_per_second,
+                    "end": min(offset + frame_bytes, len(audio)) / bytes_per_second,
+                    "text": f" {audio[offset]}",
+                }
+                for offset in range(0, len(audio), frame_bytes)
+            ]
+            text = "".join(segment["text"] for segment in segments)
+            return {"text": text, "segments": segments, "language": "en"}
+
+    return FrameModel()
+
+
+def frame_pcm(index: int) -> bytes:
+    """0.25 seconds of PCM audio with every byte set to the frame number."""
+    return bytes([index]) * (transcriber.SAMPLE_RATE // 4 * BYTES_PER_SAMPLE)
+
+
+@pytest.mark.asyncio
+async def test_live_transcriber_slides_on_segments(monkeypatch):
+    """
+    Verify that committed audio is trimmed at the last complete segment, so that the
+    window overlaps without losing or repeating words, and that decodes run one at a
+    time on the newest audio.
+    """
+    monkeypatch.setattr("utils.live_transcriber.pcm_to_audio", lambda pcm: pcm)
+    monkeypatch.setattr(settings, "STREAM_WINDOW_SECONDS", 2)
+    monkeypatch.setattr(settings, "LIVE_STEP_SECONDS", 0.5)
+    calls = []
+    updates = []
+    model = frame_model(calls)
+    gate = threading.Event()
+    gate.set()
+
+    class GatedModel:
+        def transcribe(self, audio, **options):
+            gate.wait(timeout=5)
+            return model.transcribe(audio, **options)
+
+    async def on_update(text: str) -> None:
+        updates.append(text)
+
+    live = LiveTranscriber(on_update=on_update, model_instance=GatedModel())
+    for index in range(6):
+        await live.feed(frame_pcm(index))
+        if live.decoding is not None:
+            await live.decoding
+
+    # Decodes covering half of the window commit all but their last frame, which
+    # overlaps into the next decode.
+    assert updates == [" 0 1", " 0 1 2 3", " 0 1 2 3 4 5"]
+    assert [length for length, _ in calls] == [16000, 32000, 24000]
+    assert calls[2][1] == {"language": "en", "initial_prompt": " 0 1 2"}
+
+    # A step arriving while a decode is running does not queue another decode.
+    gate.clear()
+    for index in range(6, 10):
+        await live.feed(frame_pcm(index))
+        await asyncio.sleep(0)
+    assert len(calls) == 3
+    gate.set()
+    await live.decoding
+    assert calls[3][0] == 40000
+    assert await live.finish() == " 0 1 2 3 4 5 6 7 8 9"
+    assert len(calls) == 5
+
+
+def test_live_transcribe_replays_wav(db_session, monkeypatch, tmp_path):
+    """
+    Replay a wav file into the live transcription websocket in 0.25 second frames and
+    verify the partial messages, the final message and the saved transcription.
+    """
+    # 3 second windows decoded every 0.5 seconds, audio stays as raw PCM bytes.
+    monkeypatch.setattr("utils.transcriber.load_model", lambda: frame_model([]))
+    monkeypatch.setattr("utils.live_transcriber.pcm_to_audio", lambda pcm: pcm)
+    monkeypatch.setattr(settings, "STREAM_WINDOW_SECONDS", 3)
+    monkeypatch.setattr(settings, "LIVE_STEP_SECONDS", 0.5)
+    monkeypatch.setattr(settings, "AUDIO_STORAGE_PATH", str(tmp_path))
+
+    wav_path = tmp_path / "recording.wav"
+    with wave.open(str(wav_path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(BYTES_PER_SAMPLE)
+        wav.setframerate(transcriber.SAMPLE_RATE)
+        for index in range(10):
+            wav.writeframes(frame_pcm(index))
+
+    app = FastAPI()
+    app.include_router(websocket.router)
+    app.dependency_overrides[get_db] = lambda: db_session
+    client = TestClient(app)
+
+    frame_size = transcriber.SAMPLE_RATE // 4
+    with (
+        wave.open(str(wav_path), "rb") as wav,
+        client.websocket_connect("/ws/live_transcribe?file_name=mic.wav") as ws,
+    ):
+        for _ in range(wav.getnframes() // frame_size):
+            ws.send_bytes(wav.readframes(frame_size))
+        ws.send_text("end")
+        messages = [ws.receive_json()]
+        while messages[-1]["status"] != "final":
+            messages.append(ws.receive_json())
+
+    # How many partials are sent depends on decoding speed, the transcript does not.
+    final = messages[-1]
+    assert all(msg["status"] == "partial" for msg in messages[:-1])
+    assert [msg["sequence"] for msg in messages] == list(range(1, len(messages) + 1))
+    assert final["text"] == " 0 1 2 3 4 5 6 7 8 9"
+
+    record = db_session.get(Transcription, final["id"])
+    assert record.original_audio_filename == "mic.wav"
+    assert record.text == final["text"]
+    with wave.open(record.audio_filepath, "rb") as saved:
+        assert saved.getnframes() == int(2.5 * transcriber.SAMPLE_RATE)
+
+
+# -------------------------------
+# Tests for semantic_search.py
+# -------------------------------
+def dummy_embedding_model():
+    """
+    Create a dummy embedding model that maps words onto a few shared concepts, so that
+    "refund" and "money back" are close without downloading a real model.
+    """
+    concepts = {
+        "refund": 0,
+        "money": 0,
+        "back": 0,
+        "complaint": 1,
+        "unhappy": 1,
+        "delivery": 2,
+        "parcel": 2,
+    }
+
+    class Dummy:
+        def encode(self, texts, **kwargs):  # noqa: ARG002 Keep the signature for compatibility with the real model.
+            vectors = np.full((len(texts), len(concepts) + 1), 0.01, dtype=np.float32)
+            for row, text in enumerate(texts):
+                for word in text.lower().split():
+                    if word in concepts:
+                        vectors[row, concepts[word]] += 1
+            return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    return Dummy()
+
+
+def test_vector_index_search_across_batches(monkeypatch, tmp_path):
+    """
+    Verify that the flat index returns each transcription once, ranked by its best chunk,
+    when the rows are scored over several batches.
+    """
+    monkeypatch.setattr(semantic_search, "SEARCH_BATCH_ROWS", 3)
+    index = semantic_search.VectorIndex(str(tmp_path / "index"))
+    assert index.search(np.ones(2, dtype=np.float32), 5) == []
+
+    index.add(np.array([1, 1, 2]), np.array([[1, 0], [0.6, 0.8], [0, 1]]))
+    index.add(np.array([3, 4]), np.array([[0.8, 0.6], [0.9, 0.1]]))
+    assert len(index) == 5
+
+    results = index.search(np.array([1, 0], dtype=np.float32), 3)
+    assert [transcription_id for transcription_id, _ in results] == [1, 4, 3]
+    assert results[0][1] == pytest.approx(1.0)
+
+
+def test_vector_index_drops_half_written_append(tmp_path):
+    """
+    Verify that a vector written without its id, e.g. by an interrupted append, is
+    dropped by the next append instead of shifting the ids of the rows after it.
+    """
+    index = semantic_search.VectorIndex(str(tmp_path / "index"))
+    index.add(np.array([1]), np.array([[1, 0]]))
+    with open(index.vectors_path, "ab") as vectors_file:
+        vectors_file.write(np.array([[0.6, 0.8]], dtype=np.float32).tobytes())
+
+    index.add(np.array([3]), np.array([[0, 1]]))
+    assert len(index) == 2
+    assert index.indexed_ids() == {1, 3}
+    results = index.search(np.array([0, 1], dtype=np.float32), 1)
+    assert results[0][0] == 3
+    assert results[0][1] == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_semantic_and_hybrid_search(db_session, monkeypatch, tmp_path):
+    """
+    Verify that transcripts are indexed when saved by process_transcription_batch, and
+    that semantic search finds a transcript by meaning rather than by file name.
+    """
+    monkeypatch.setattr(settings, "SEMANTIC_SEARCH", True)
+    monkeypatch.setattr(settings, "VECTOR_INDEX_PATH", str(tmp_path / "index"))
+    monkeypatch.delattr(semantic_search.get_vector_index, "index", raising=False)
+    monkeypatch.setattr(
+        "utils.semantic_search.get_embedding_model", dummy_embedding_model
+    )
+
+    texts = iter(["the caller wants their money back", "my parcel delivery is late"])
+
+    class SequenceModel:
+        def transcribe(self, audio):  # noqa: ARG002 Keep the signature for compatibility with the real model.
+            return {"text": next(texts)}
+
+    monkeypatch.setattr("utils.transcriber.load_model", SequenceModel)
+    monkeypatch.setattr("utils.transcriber.load_audio", dummy_load_audio)
+    await transcriber.process_transcription_batch(
+        "semantic_batch",
+        ["audio/call1.mp3", "audio/call2.mp3"],
+        ["call1.mp3", "call2.mp3"],
+        db_session,
+    )
+
+    app = FastAPI()
+    app.include_router(transcriptions.router)
+    app.dependency_overrides[get_db] = lambda: db_session
+    client = TestClient(app)
+
+    results = client.get(
+        "/api/search", params={"q": "refund", "mode": "semantic", "limit": 1}
+    ).json()
+    assert [item["original_audio_filename"] for item in results] == ["call1.mp3"]
+
+    results = client.get(
+        "/api/search", params={"file_name": "call2", "q": "refund", "mode": "hybrid"}
+    ).json()
+    # call2 is ranked by both searches, call1 by the semantic search only.
+    assert [item["original_audio_filename"] for item in results] == [
+        "call2.mp3",
+        "call1.mp3",
+    ]
+
+    # limit also caps the file name matches merged in hybrid mode.
+    results = client.get(
+        "/api/search",
+        params={"file_name": "call", "q": "refund", "mode": "hybrid", "limit": 1},
+    ).json()
+    assert [item["original_audio_filename"] for item in results] == ["call1.mp3"]
+
+    response = client.get("/api/search", params={"file_name": "x", "mode": "semantic"})
+    assert response.status_code == 400
+    monkeypatch.setattr(settings, "SEMANTIC_SEARCH", False)
+    response = client.get("/api/search", params={"q": "x", "mode": "semantic"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_semantic_indexing_errors_do_not_stop_batches(
+    db_session, monkeypatch, tmp_path
+):
+    """
+    Verify that a failing embedding model does not stop a batch, and that the
+    transcripts it left out are indexed by reindex_missing_transcriptions.
+    """
+    monkeypatch.setattr(settings, "SEMANTIC_SEARCH", True)
+    monkeypatch.setattr(settings, "VECTOR_INDEX_PATH", str(tmp_path / "index"))
+    monkeypatch.delattr(semantic_search.get_vector_index, "index", raising=False)
+
+    def missing_embedding_model():
+        msg = "No module named 'sentence_transformers'"
+        raise ImportError(msg)
+
+    monkeypatch.setattr(
+        "utils.semantic_search.get_embedding_model", missing_embedding_model
+    )
+    monkeypatch.setattr("utils.transcriber.load_model", lambda: dummy_model())
+    monkeypatch.setattr("utils.transcriber.load_audio", dummy_load_audio)
+
+    batch_uuid = "failing_index_batch"
+    dummy_ws = DummyWebSocket()
+    add_websocket(batch_uuid, dummy_ws)
+    await transcriber.process_transcription_batch(
+        batch_uuid,
+        ["audio/call1.mp3", "audio/call2.mp3"],
+        ["call1.mp3", "call2.mp3"],
+        db_session,
+    )
+    remove_websocket(batch_uuid, dummy_ws)
+    statuses = [msg["status"] for msg in dummy_ws.sent_messages]
+    assert statuses.count("completed") == 2
+    assert statuses[-1] == "batch_completed"
+    assert semantic_search.get_vector_index().indexed_ids() == set()
+
+    monkeypatch.setattr(
+        "utils.semantic_search.get_embedding_model", dummy_embedding_model
+    )
+    assert semantic_search.reindex_missing_transcriptions(db_session) == 2
+    assert semantic_search.get_vector_index().indexed_ids() == {
+        record.id for record in db_session.query(Transcription)
+    }
+    assert semantic_search.reindex_missing_transcriptions(db_session) == 0
+
+
+# -------------------------------
+# Tests for worker_runtime.py
+# -------------------------------
+def test_plan_workers_sizes_to_memory_and_cpus():
+    """
+    Verify that workers x threads matches the CPU count, with as many workers as model
+    instances fit in memory.
+    """
+    # 12 medium models fit in 64 GB next to the reserved memory.
+    plan = plan_workers(cpus=32, memory_mb=64 * 1024, per_model_mb=5120)
+    assert (plan.workers, plan.threads) == (12, 2)
+
+    # Not enough memory for a second instance, it gets every CPU.
+    plan = plan_workers(cpus=32, memory_mb=4096, per_model_mb=5120)
+    assert (plan.workers, plan.threads) == (1, 32)
+
+    # Never more workers than CPUs.
+    plan = plan_workers(cpus=32, memory_mb=256 * 1024, per_model_mb=1024)
+    assert (plan.workers, plan.threads) == (32, 1)
+
+    # Explicit workers and threads take precedence.
+    plan = plan_workers(cpus=32, memory_mb=4096, per_model_mb=5120, workers=4)
+    assert (plan.workers, plan.threads) == (4, 8)
+    plan = plan_workers(32, 4096, 5120, workers=4, threads=4)
+    assert (plan.workers, plan.threads) == (4, 4)
+
+
+def test_main_pins_threads_before_numpy_import(tmp_path):
+    """
+    Verify that importing the app sets the BLAS thread counts before numpy is imported,
+    as numpy reads them once when it is loaded.
+    """
+    script = (
+        "import os, sys\n"
+        "class Watch:\n"
+        "    def find_spec(self, name, path=None, target=None):\n"
+        "        if name == 'numpy':\n"
+        "            print(os.environ.get('OPENBLAS_NUM_THREADS'))\n"
+        "sys.meta_path.insert(0, Watch())\n"
+        "import main\n"
+    )
+    env = {
+        name: value
+        for name, value in os.environ.items()
+        if name not in {"OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"}
+    }
+    env.update(MODEL_THREADS="3", AUDIO_STORAGE_PATH=str(tmp_path))
+    result = subprocess.run(  # noqa: S603 Runs the current interpreter on a fixed script.
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.splitlines()[0] == "3"
+
+
+def test_model_pool_bounds_instances():
+    """
+    Verify that the pool loads at most `size` models and that a thread waits for an
+    instance to be released instead of loading another one.
+    """
+    loaded = []
+
+    def factory():
+        loaded.append(object())
+        return loaded[-1]
+
+    pool = ModelPool(factory, lambda: 2)
+    acquired = threading.Event()
+
+    def worker():
+        with pool.acquire():
+            acquired.set()
+
+    with pool.acquire() as first, pool.acquire() as second:
+        assert first is not second
+        thread = threading.Thread(target=worker)
+        thread.start()
+        assert not acquired.wait(timeout=0.1)
+    thread.join(timeout=1)
+    assert acquired.is_set()
+    assert len(loaded) == 2
+
+    with pool.acquire() as model:
+        assert model in loaded
+
+
+def test_model_pool_reserves_live_instances():
+    """
+    Verify that batches cannot check out the instances reserved for live transcription,
+    and that a live caller times out instead of waiting when every instance is busy.
+    """
+    pool = ModelPool(object, lambda: 2, lambda: 1)
+    with pool.acquire() as batch_model:
+        with pytest.raises(TimeoutError), pool.acquire(timeout=0.05):
+            pass
+        with pool.acquire(reserved=True, timeout=0.05) as live_model:
+            assert live_model is not batch_model
+            with pytest.raises(TimeoutError), pool.acquire(reserved=True, timeout=0.05):
+                pass
+
+    # A single instance is never reserved, batches can still use it.
+    pool = ModelPool(object, lambda: 1, lambda: 1)
+    with pool.acquire():
+        pass
+
+
+@pytest.mark.asyncio
+async def test_live_transcriber_skips_partials_without_free_model(monkeypatch):
+    """
+    Verify that a live partial decode is skipped when every model instance is held by a
+    batch, and that the transcript is still decoded in full once one is released.
+    """
+    monkeypatch.setattr("utils.live_transcriber.pcm_to_audio", lambda pcm: pcm)
+    monkeypatch.setattr("utils.transcriber.load_model", lambda: frame_model([]))
+    monkeypatch.setattr(settings, "STREAM_WINDOW_SECONDS", 2)
+    monkeypatch.setattr(settings, "LIVE_STEP_SECONDS", 0.05)
+    monkeypatch.setattr(
+        transcriber,
+        "model_pool",
+        ModelPool(lambda: transcriber.load_model(), lambda: 1),
+    )
+    updates = []
+
+    async def on_update(text: str) -> None:
+        updates.append(text)
+
+    live = LiveTranscriber(on_update=on_update)
+    with transcriber.acquire_model():
+        for index in range(2):
+            await live.feed(frame_pcm(index))
+        await live.decoding
+    assert updates == []
+    assert await live.finish() == " 0 1"
+
+
 # -------------------------------
 # Tests for db_operations.py
 # -------------------------------
@@ -188,7 +957,7 @@ def test_db_save_and_get_transcriptions(db_session):
         db=db_session,
     )
 
-    records = db_operations.db_get_transcriptions(db_session)
+    records = db_session.query(Transcription).all()
     assert len(records) == 1
     record = records[0]
     assert record.audio_filepath == "audio/path.mp3"
@@ -196,12 +965,12 @@ def test_db_save_and_get_transcriptions(db_session):
     assert record.text == "Test transcription"
 
 
-def test_db_search_transcriptions(db_session):
+def test_db_search_transcription_rows_by_file_name(db_session):
     """
-    Test the db_search_transcriptions function from the db_operations module with various search criteria.
+    Test the db_search_transcription_rows function from the db_operations module with various search criteria.
 
     This test verifies that:
-        - A partial search (case-insensitive) returns all records containing the search term.
+        - A partial search (case-insensitive) returns all rows containing the search term.
         - A full file name match (case-insensitive) with an exact file name returns records regardless of case.
         - A partial search with case sensitivity returns only the records where the search term appears with exact case.
         - A full file name match with case sensitivity returns exactly one record for an exact match.
@@ -226,7 +995,7 @@ def test_db_search_transcriptions(db_session):
     # Test partial search (case-insensitive).
     # Searching for "sample" should return all 5 records because "sample" appears (ignoring case)
     # in each original_audio_filename.
-    results_partial = db_operations.db_search_transcriptions(
+    results_partial = db_operations.db_search_transcription_rows(
         "sample", match_full_file_name=False, match_case=False, db=db_session
     )
     assert len(results_partial) == 5
@@ -234,35 +1003,252 @@ def test_db_search_transcriptions(db_session):
     # Test full file name match (case-insensitive):
     # Using "Sample1.mp3" should match both "Sample1.mp3" and "sample1.mp3" when performing a full
     # file name match without considering case.
-    results_full_insensitive = db_operations.db_search_transcriptions(
+    results_full_insensitive = db_operations.db_search_transcription_rows(
         "Sample1.mp3", match_full_file_name=True, match_case=False, db=db_session
     )
     assert len(results_full_insensitive) == 2, (
         f"Expected 2 records for case-insensitive full-match; got: {results_full_insensitive}"
     )
     # Verify that the matched filenames are exactly "Sample1.mp3" and "sample1.mp3".
-    filenames = {record.original_audio_filename for record in results_full_insensitive}
+    filenames = {row.original_audio_filename for row in results_full_insensitive}
     assert filenames == {"Sample1.mp3", "sample1.mp3"}
 
     # Test partial search with case sensitivity:
     # Using "Sample1" should return only those filenames where the substring "Sample1" appears with the exact case.
     # In this case, it should match "Sample1.mp3" and "Sample11.mp3".
-    results_partial_sensitive = db_operations.db_search_transcriptions(
+    results_partial_sensitive = db_operations.db_search_transcription_rows(
         "Sample1", match_full_file_name=False, match_case=True, db=db_session
     )
     assert len(results_partial_sensitive) == 2, (
         f"Expected 2 records for case-sensitive partial search; got: {results_partial_sensitive}"
     )
     # Check that the returned filenames are "Sample1.mp3" and "Sample11.mp3".
-    filenames = {record.original_audio_filename for record in results_partial_sensitive}
+    filenames = {row.original_audio_filename for row in results_partial_sensitive}
     assert filenames == {"Sample1.mp3", "Sample11.mp3"}
 
     # Test full file name match with case sensitivity (exact match):
     # Using "Sample1.mp3" should return only the record with an exact matching original_audio_filename.
-    results_full_sensitive = db_operations.db_search_transcriptions(
+    results_full_sensitive = db_operations.db_search_transcription_rows(
         "Sample1.mp3", match_full_file_name=True, match_case=True, db=db_session
     )
     assert len(results_full_sensitive) == 1, (
         f"Expected 1 record for case-sensitive full-match; got: {results_full_sensitive}"
     )
     assert results_full_sensitive[0].original_audio_filename == "Sample1.mp3"
+
+
+def test_db_transcription_text_is_compressed(db_session):
+    """
+    Verify that long transcripts are stored compressed with a short preview, that listing
+    queries do not load the compressed text, and that the full text is served per id.
+    """
+    long_text = "the customer wants their money back " * 50
+    db_operations.db_save_transcription(
+        "audio/long.mp3", "long.mp3", long_text, db=db_session
+    )
+    db_session.expunge_all()
+
+    record = db_session.query(Transcription).all()[0]
+    assert "text_zstd" not in record.__dict__
+    assert len(record.preview) <= compression.PREVIEW_LENGTH + len("...")
+    assert record.preview.endswith("...")
+    assert long_text.startswith(record.preview.removesuffix("..."))
+
+    app = FastAPI()
+    app.include_router(transcriptions.router)
+    app.dependency_overrides[get_db] = lambda: db_session
+    client = TestClient(app)
+
+    listing = client.get("/api/transcriptions").json()
+    assert listing[0]["preview"] == record.preview
+    assert "text" not in listing[0]
+
+    response = client.get(f"/api/transcriptions/{record.id}")
+    assert response.status_code == 200
+    assert response.json()["text"] == long_text
+    assert len(record.text_zstd) < len(long_text.encode()) // 10
+
+    assert client.get("/api/transcriptions/999999").status_code == 404
+
+
+def test_db_train_compression_dictionary(db_session):
+    """
+    Verify that transcripts saved before and after training a shared dictionary can
+    both be read back, and that the samples are loaded in a single query.
+    """
+    compression.clear_dictionaries()
+    db_operations.db_save_transcriptions_bulk(
+        [
+            (
+                f"audio/{i}.mp3",
+                f"{i}.mp3",
+                f"call {i}: caller {i % 7} asked about order {i * 31}",
+            )
+            for i in range(1000)
+        ],
+        db=db_session,
+    )
+
+    db_session.expunge_all()
+    selects = []
+
+    def count_selects(conn, cursor, statement, *args):  # noqa: ARG001 Signature of the SQLAlchemy event.
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    try:
+        event.listen(db_session.bind, "before_cursor_execute", count_selects)
+        try:
+            dictionary_id = db_operations.db_train_compression_dictionary(db=db_session)
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", count_selects)
+        # The sample query and the lookup of an existing dictionary with the same id.
+        assert len(selects) <= 2
+        assert db_session.get(CompressionDictionary, dictionary_id)
+
+        db_operations.db_save_transcription(
+            "audio/new.mp3", "new.mp3", "call 1001: caller 0 asked", db=db_session
+        )
+        db_session.expunge_all()
+        records = {
+            record.original_audio_filename: record
+            for record in db_session.query(Transcription).all()
+        }
+        texts = {name: record.text for name, record in records.items()}
+        assert (
+            zstandard.get_frame_parameters(records["new.mp3"].text_zstd).dict_id
+            == dictionary_id
+        )
+        assert texts["new.mp3"] == "call 1001: caller 0 asked"
+        assert texts["0.mp3"] == "call 0: caller 0 asked about order 0"
+    finally:
+        compression.clear_dictionaries()
+
+
+def test_db_train_compression_dictionary_needs_samples(db_session):
+    """
+    Verify that training from too few transcripts is skipped instead of failing.
+    """
+    db_operations.db_save_transcription(
+        "audio/only.mp3", "only.mp3", "the only transcript", db=db_session
+    )
+    assert db_operations.db_train_compression_dictionary(db=db_session) is None
+    assert db_session.query(CompressionDictionary).count() == 0
+
+
+def test_migrate_plain_text_column(tmp_path):
+    """
+    Verify that a database with plain transcripts is migrated to compressed ones over
+    several batches, and that dropping the plain column and vacuuming makes the file
+    smaller.
+    """
+    database_path = tmp_path / "legacy.db"
+    engine = create_engine(f"sqlite:///{database_path}")
+    plain_text = "the caller asked about their order. " * 200
+    with engine.begin() as connection:
+        connection.execute(
+            sql_text(
+                "CREATE TABLE transcriptions (id INTEGER PRIMARY KEY, "
+                "audio_filepath VARCHAR, original_audio_filename VARCHAR, "
+                "text VARCHAR, created_at DATETIME)"
+            )
+        )
+        for i in range(200):
+            connection.execute(
+                sql_text(
+                    "INSERT INTO transcriptions (audio_filepath, "
+                    "original_audio_filename, text) VALUES (:path, :name, :text)"
+                ),
+                {"path": f"audio/{i}.mp3", "name": f"{i}.mp3", "text": plain_text},
+            )
+    size_before = os.path.getsize(database_path)
+
+    migrate_plain_text_column(engine, batch_size=64)
+
+    columns = {
+        column["name"] for column in inspect(engine).get_columns("transcriptions")
+    }
+    assert "text" not in columns
+    assert os.path.getsize(database_path) < size_before / 2
+    with sessionmaker(bind=engine)() as session:
+        assert (
+            session.query(Transcription)
+            .filter(Transcription.text_zstd.is_(None))
+            .count()
+            == 0
+        )
+        record = session.get(Transcription, 200)
+        assert record.text == plain_text
+        assert record.preview == compression.make_preview(plain_text)
+    engine.dispose()
+
+
+def test_db_search_transcription_rows(db_session):
+    """
+    Verify that the Core listing rows match the ORM entities, and that the shared row
+    encoder serves them with the same ISO timestamps as the ORM entities.
+    """
+    db_operations.db_save_transcription(
+        "audio1.mp3", "Sample1.mp3", "text 1", db=db_session
+    )
+    db_operations.db_save_transcription(
+        "audio2.mp3", "other.mp3", "text 2", db=db_session
+    )
+
+    rows = db_operations.db_get_transcription_rows(db=db_session)
+    records = db_session.query(Transcription).order_by(Transcription.id).all()
+    assert [tuple(row[:4]) for row in rows] == [
+        (
+            record.id,
+            record.audio_filepath,
+            record.original_audio_filename,
+            record.preview,
+        )
+        for record in records
+    ]
+    assert [datetime.fromisoformat(row.created_at) for row in rows] == [
+        record.created_at for record in records
+    ]
+
+    app = FastAPI()
+    app.include_router(transcriptions.router)
+    app.dependency_overrides[get_db] = lambda: db_session
+    client = TestClient(app)
+
+    listing = client.get("/api/transcriptions").json()
+    records = db_session.query(Transcription).all()
+    assert [item["id"] for item in listing] == [record.id for record in records]
+    for item, record in zip(listing, records, strict=True):
+        assert item["original_audio_filename"] == record.original_audio_filename
+        assert item["preview"] == record.preview
+        assert datetime.fromisoformat(item["created_at"]) == record.created_at
+
+    results = client.get("/api/search", params={"file_name": "sample"}).json()
+    assert [item["original_audio_filename"] for item in results] == ["Sample1.mp3"]
+
+
+def test_gzip_limited_to_transcription_responses(db_session, tmp_path):
+    """
+    Verify that transcription listings are gzip compressed while audio files served from
+    audio_storage are sent as they are.
+    """
+    for i in range(20):
+        db_operations.db_save_transcription(
+            f"audio/{i}.mp3", f"{i}.mp3", "text", db=db_session
+        )
+    (tmp_path / "call.mp3").write_bytes(b"\x00" * 4096)
+
+    app = FastAPI()
+    app.add_middleware(responses.TranscriptionGZipMiddleware, minimum_size=500)
+    app.include_router(transcriptions.router)
+    app.mount("/api/audio_storage", StaticFiles(directory=str(tmp_path)))
+    app.dependency_overrides[get_db] = lambda: db_session
+    client = TestClient(app)
+
+    headers = {"Accept-Encoding": "gzip"}
+    listing = client.get("/api/transcriptions", headers=headers)
+    assert listing.headers["content-encoding"] == "gzip"
+    assert len(listing.json()) == 20
+    audio = client.get("/api/audio_storage/call.mp3", headers=headers)
+    assert "content-encoding" not in audio.headers
+    assert audio.content == b"\x00" * 4096
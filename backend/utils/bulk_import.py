@@ -0,0 +1,309 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+import shutil
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import replace
+from itertools import islice
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal, init_db
+from log_config import logger
+from utils.db_operations import (
+    db_get_audio_filepaths,
+    db_save_transcriptions_bulk,
+    db_train_compression_dictionary,
+)
+from utils.semantic_search import index_saved_transcriptions
+from utils.transcriber import SUPPORTED_AUDIO_EXTENSIONS, transcribe_audio
+from utils.worker_runtime import get_worker_plan, pin_threads, set_worker_plan
+
+DEFAULT_CHECKPOINT_PATH = os.path.join("data", "bulk_import.checkpoint")
+FAILURES_SUFFIX = ".failed"
+# Transcriptions queued per worker process, bounds the work lost when saving fails
+TASKS_PER_WORKER = 4
+
+
+def iter_audio_files(directory: str) -> Iterator[str]:
+    """Walk a directory and yield the absolute path of every supported audio file."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file_name in sorted(files):
+            if file_name.endswith(SUPPORTED_AUDIO_EXTENSIONS):
+                yield os.path.abspath(os.path.join(root, file_name))
+
+
+def iter_manifest_files(manifest_path: str) -> Iterator[str]:
+    """Yield the absolute path of every supported audio file listed in a manifest."""
+    with open(manifest_path, encoding="utf-8") as manifest:
+        for line in manifest:
+            path = line.strip()
+            if path and path.endswith(SUPPORTED_AUDIO_EXTENSIONS):
+                yield os.path.abspath(path)
+
+
+def storage_path_for(source_path: str) -> str:
+    """
+    Deterministic audio_storage path for an archived file, so that re-running the
+    import can recognise files already saved to the database.
+    - Mirrors the f"{batch_uuid}_{file.filename}" naming used by POST /transcribe
+    """
+    digest = hashlib.sha256(source_path.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(
+        settings.AUDIO_STORAGE_PATH, f"bulk_{digest}_{os.path.basename(source_path)}"
+    )
+
+
+def load_checkpoint(checkpoint_path: str) -> set[str]:
+    """Load the set of source paths recorded as imported by a previous run."""
+    if not os.path.exists(checkpoint_path):
+        return set()
+    with open(checkpoint_path, encoding="utf-8") as checkpoint:
+        return {line.rstrip("\n") for line in checkpoint if line.strip()}
+
+
+def append_checkpoint(checkpoint_path: str, source_paths: list[str]) -> None:
+    """Durably append imported source paths to the checkpoint file."""
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+        checkpoint.writelines(f"{path}\n" for path in source_paths)
+        checkpoint.flush()
+        os.fsync(checkpoint.fileno())
+
+
+def failures_path_for(checkpoint_path: str) -> str:
+    """
+    File listing the source paths that could not be transcribed, one per line.
+    - It has the manifest format, so failed files can be retried with --manifest
+    """
+    return checkpoint_path + FAILURES_SUFFIX
+
+
+def transcribe_archived_file(source_path: str) -> tuple[str | None, str | None]:
+    """
+    Transcribe one archived file, returning (text, None) or (None, error).
+    - Errors are returned instead of raised, so that one unreadable recording does not
+        stop the import of the rest of the archive
+    """
+    try:
+        return transcribe_audio(source_path), None
+    except Exception as e:  # any decoding or model error skips the file
+        return None, f"{type(e).__name__}: {e}"
+
+
+def iter_pool_results(
+    executor: Executor, pending: list[str], window: int
+) -> Iterator[tuple[str | None, str | None]]:
+    """
+    Transcribe pending files on the executor in submission order, with at most window
+    files queued at a time instead of submitting the whole archive up front.
+    """
+    paths = iter(pending)
+    futures = deque(
+        executor.submit(transcribe_archived_file, path)
+        for path in islice(paths, window)
+    )
+    while futures:
+        result = futures.popleft().result()
+        futures.extend(
+            executor.submit(transcribe_archived_file, path) for path in islice(paths, 1)
+        )
+        yield result
+
+
+def _import_batch(batch: list[tuple[str, str]], checkpoint_path: str, db: Session):
+    """Copy a transcribed batch into audio storage, bulk insert it and checkpoint it."""
+    records = []
+    for source_path, text in batch:
+        audio_path = storage_path_for(source_path)
+        shutil.copyfile(source_path, audio_path)
+        records.append((audio_path, os.path.basename(source_path), text))
+
+    # The database is committed before the checkpoint, a crash in between is
+    # still skipped on resume as the storage path is already in the database.
+    transcriptions = db_save_transcriptions_bulk(records, db)
+    index_saved_transcriptions(
+        [
+            (transcription.id, text)
+            for transcription, (_, _, text) in zip(transcriptions, records, strict=True)
+        ]
+    )
+    append_checkpoint(checkpoint_path, [source_path for source_path, _ in batch])
+
+
+def _import_transcribed(
+    pending: list[str],
+    results: Iterable[tuple[str | None, str | None]],
+    batch_size: int,
+    checkpoint_path: str,
+    db: Session,
+) -> int:
+    """
+    Consume transcripts in submission order, saving every batch_size of them.
+    - Files that failed to transcribe are logged and recorded in the failures file
+    """
+    imported = 0
+    batch = []
+    for source_path, (text, error) in zip(pending, results, strict=True):
+        if error is not None:
+            logger.error(f"Bulk import: failed to transcribe {source_path}: {error}")
+            append_checkpoint(failures_path_for(checkpoint_path), [source_path])
+            continue
+        batch.append((source_path, text))
+        if len(batch) >= batch_size:
+            _import_batch(batch, checkpoint_path, db)
+            imported += len(batch)
+            batch = []
+            logger.info(f"Bulk import: {imported}/{len(pending)} files imported")
+    if batch:
+        _import_batch(batch, checkpoint_path, db)
+        imported += len(batch)
+        logger.info(f"Bulk import: {imported}/{len(pending)} files imported")
+    return imported
+
+
+def run_bulk_import(  # noqa: PLR0913
+    source_paths: Iterable[str],
+    db: Session,
+    workers: int = 0,
+    batch_size: int = 32,
+    checkpoint_path: str = DEFAULT_CHECKPOINT_PATH,
+    *,
+    retry_failed: bool = False,
+) -> int:
+    """
+    Back-fill the database from pre-existing audio files without going over HTTP.
+    - Skips files recorded in the checkpoint or already saved to the database
+    - Files that fail to transcribe are logged, recorded in the failures file next to
+        the checkpoint and skipped, the import carries on with the rest of the archive
+        - Later runs skip them too, unless retry_failed is set
+    - Transcribes each file with transcribe_audio, on a process pool when workers > 1
+        - Every worker process loads its own model through get_model
+        - Without explicit workers, runs as many processes as model instances fit in
+            memory, see backend/utils/worker_runtime.py > get_worker_plan
+        - Each process is pinned to its share of the CPUs, so that workers x threads
+            matches the CPU count. Processes are spawned rather than forked, so that
+            they load numpy and torch after the thread counts are set
+        - The pool keeps transcribing while finished batches are being saved, with a
+            bounded number of files queued so that a failed save cancels little work
+    - Saves each batch of batch_size files with a single commit, then checkpoints it
+    - Returns the number of files imported by this run
+    """
+    done = load_checkpoint(checkpoint_path)
+    if not retry_failed:
+        done |= load_checkpoint(failures_path_for(checkpoint_path))
+    existing = db_get_audio_filepaths(db)
+    pending = [
+        path
+        for path in dict.fromkeys(source_paths)
+        if path not in done and storage_path_for(path) not in existing
+    ]
+    plan = get_worker_plan()
+    workers = workers or plan.workers
+    threads = settings.MODEL_THREADS or max(1, plan.cpus // workers)
+    logger.info(
+        f"Bulk import: {len(pending)} files to transcribe with {workers} worker(s) "
+        f"x {threads} thread(s)"
+    )
+
+    pin_threads(threads)
+    if workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            # Each process transcribes one file at a time with its share of the CPUs
+            initializer=set_worker_plan,
+            initargs=(replace(plan, workers=1, threads=threads),),
+        ) as executor:
+            try:
+                return _import_transcribed(
+                    pending,
+                    iter_pool_results(executor, pending, workers * TASKS_PER_WORKER),
+                    batch_size,
+                    checkpoint_path,
+                    db,
+                )
+            except BaseException:
+                # Only wait for the files being transcribed, not the queued ones
+                executor.shutdown(cancel_futures=True)
+                raise
+    return _import_transcribed(
+        pending,
+        map(transcribe_archived_file, pending),
+        batch_size,
+        checkpoint_path,
+        db,
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Bulk import an archive of audio files into the transcriptions database."
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "directory", nargs="?", help="Directory to walk for audio files"
+    )
+    source.add_argument("--manifest", help="File listing one audio file path per line")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Number of transcription processes, sized to available memory by default",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=32, help="Files saved per database commit"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=DEFAULT_CHECKPOINT_PATH,
+        help="Checkpoint file used to resume an interrupted import",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Transcribe again the files recorded in the failures file",
+    )
+    parser.add_argument(
+        "--train-dictionary",
+        action="store_true",
+        help="Train a shared compression dictionary from the transcripts in the "
+        "database, after the import when a directory or --manifest is given",
+    )
+    args = parser.parse_args(argv)
+    has_source = args.manifest is not None or args.directory is not None
+    if not has_source and not args.train_dictionary:
+        parser.error("a directory or --manifest is required")
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if has_source:
+            source_paths = (
+                iter_manifest_files(args.manifest)
+                if args.manifest
+                else iter_audio_files(args.directory)
+            )
+            imported = run_bulk_import(
+                source_paths,
+                db,
+                workers=args.workers,
+                batch_size=args.batch_size,
+                checkpoint_path=args.checkpoint,
+                retry_failed=args.retry_failed,
+            )
+            logger.info(f"Bulk import finished: {imported} files imported")
+        if args.train_dictionary:
+            dictionary_id = db_train_compression_dictionary(db=db)
+            if dictionary_id is not None:
+                logger.info(f"Trained compression dictionary {dictionary_id}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
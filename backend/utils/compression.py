@@ -0,0 +1,77 @@
+from collections.abc import Callable
+
+import zstandard
+
+ZSTD_LEVEL = 9
+PREVIEW_LENGTH = 200
+DICTIONARY_SIZE = 110 * 1024  # zstd's recommended dictionary size
+# zstd cannot train a dictionary from a handful of small samples
+MIN_DICTIONARY_SAMPLES = 100
+
+# zstd dictionary id -> dictionary, id 0 is reserved for frames without a dictionary
+_dictionaries: dict[int, zstandard.ZstdCompressionDict] = {}
+_current_dictionary_id = 0
+
+
+def register_dictionary(dictionary_data: bytes) -> int:
+    """
+    Make a shared dictionary available for decompression and use it for all new
+    transcripts. Returns the dictionary id that is written into every zstd frame.
+    """
+    global _current_dictionary_id  # noqa: PLW0603 process wide dictionary cache
+    dictionary = zstandard.ZstdCompressionDict(dictionary_data)
+    dictionary.precompute_compress(level=ZSTD_LEVEL)
+    _dictionaries[dictionary.dict_id()] = dictionary
+    _current_dictionary_id = dictionary.dict_id()
+    return _current_dictionary_id
+
+
+def clear_dictionaries() -> None:
+    """Forget all registered dictionaries, new transcripts are compressed without one."""
+    global _current_dictionary_id  # noqa: PLW0603 process wide dictionary cache
+    _dictionaries.clear()
+    _current_dictionary_id = 0
+
+
+def train_dictionary(samples: list[str]) -> bytes:
+    """Train a shared zstd dictionary from a sample of transcripts."""
+    return zstandard.train_dictionary(
+        DICTIONARY_SIZE, [sample.encode("utf-8") for sample in samples]
+    ).as_bytes()
+
+
+def compress_text(text: str) -> bytes:
+    """Compress a transcript with the current shared dictionary, if one is registered."""
+    compressor = zstandard.ZstdCompressor(
+        level=ZSTD_LEVEL, dict_data=_dictionaries.get(_current_dictionary_id)
+    )
+    return compressor.compress(text.encode("utf-8"))
+
+
+def decompress_text(
+    data: bytes, load_dictionary: Callable[[int], bytes | None] | None = None
+) -> str:
+    """
+    Decompress a transcript, looking up the dictionary id stored in its zstd frame.
+    - load_dictionary is called for dictionaries this process has not seen yet, e.g.
+        one trained by the bulk importer while the server is running
+    """
+    dictionary_id = zstandard.get_frame_parameters(data).dict_id
+    if dictionary_id and dictionary_id not in _dictionaries:
+        dictionary_data = load_dictionary(dictionary_id) if load_dictionary else None
+        if dictionary_data is None:
+            msg = f"Unknown zstd dictionary {dictionary_id}"
+            raise ValueError(msg)
+        _dictionaries[dictionary_id] = zstandard.ZstdCompressionDict(dictionary_data)
+
+    decompressor = zstandard.ZstdDecompressor(
+        dict_data=_dictionaries.get(dictionary_id)
+    )
+    return decompressor.decompress(data).decode("utf-8")
+
+
+def make_preview(text: str) -> str:
+    """Shorten a transcript for list views, cutting at the last whole word."""
+    if len(text) <= PREVIEW_LENGTH:
+        return text
+    return text[:PREVIEW_LENGTH].rsplit(" ", 1)[0] + "..."
@@ -1,8 +1,15 @@
+import zstandard
 from fastapi import Depends
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import String, func, select, type_coerce
+from sqlalchemy.orm import Session, undefer
 
-from database import Transcription, get_db
+from database import CompressionDictionary, Transcription, get_db
+from log_config import logger
+from utils.compression import (
+    MIN_DICTIONARY_SAMPLES,
+    register_dictionary,
+    train_dictionary,
+)
 
 
 def db_save_transcription(
@@ -10,7 +17,7 @@ def db_save_transcription(
     original_audio_filename: str,
     transcribed_text: str,
     db: Session = Depends(get_db),
-) -> None:
+) -> Transcription:
     """Save a transcription record to the database using the provided session."""
     transcription = Transcription(
         audio_filepath=audio_filepath,
@@ -19,38 +26,160 @@ def db_save_transcription(
     )
     db.add(transcription)
     db.commit()
+    return transcription
 
 
-def db_get_transcriptions(db: Session = Depends(get_db)):
-    """Retrieve all transcriptions from the database."""
-    return db.query(Transcription).all()
+def db_save_transcriptions_bulk(
+    records: list[tuple[str, str, str]],
+    db: Session = Depends(get_db),
+) -> list[Transcription]:
+    """
+    Save many (audio_filepath, original_audio_filename, transcribed_text) records
+    in a single transaction, used by the bulk importer.
+    """
+    transcriptions = [
+        Transcription(
+            audio_filepath=audio_filepath,
+            original_audio_filename=original_audio_filename,
+            text=transcribed_text,
+        )
+        for audio_filepath, original_audio_filename, transcribed_text in records
+    ]
+    db.add_all(transcriptions)
+    db.commit()
+    return transcriptions
+
+
+def db_get_audio_filepaths(db: Session = Depends(get_db)) -> set[str]:
+    """Retrieve the audio_filepath of every stored transcription."""
+    return {
+        audio_filepath
+        for (audio_filepath,) in db.query(Transcription.audio_filepath).all()
+    }
+
+
+def db_get_transcription_ids(db: Session = Depends(get_db)) -> list[int]:
+    """Retrieve the id of every stored transcription, in insertion order."""
+    return [
+        transcription_id
+        for (transcription_id,) in db.query(Transcription.id).order_by(Transcription.id)
+    ]
+
 
+def db_get_transcription_texts(
+    transcription_ids: list[int], db: Session = Depends(get_db)
+) -> list[tuple[int, str]]:
+    """Retrieve (id, full text) of the given transcriptions, decompressing each text."""
+    return [
+        (transcription.id, transcription.text)
+        for transcription in db.query(Transcription)
+        .options(undefer(Transcription.text_zstd))
+        .filter(Transcription.id.in_(transcription_ids))
+        .order_by(Transcription.id)
+    ]
 
-def db_search_transcriptions(
+
+def db_get_transcription(transcription_id: int, db: Session = Depends(get_db)):
+    """Retrieve a single transcription, or None if it does not exist."""
+    return db.get(Transcription, transcription_id)
+
+
+def db_train_compression_dictionary(
+    sample_size: int = 10000, db: Session = Depends(get_db)
+) -> int | None:
+    """
+    Train a shared zstd dictionary from the most recent transcripts, store it and use it
+    to compress all new transcripts. Returns the new dictionary id.
+    - Returns None without a new dictionary when there are fewer than
+        MIN_DICTIONARY_SAMPLES transcripts or zstd cannot train from them, transcripts
+        keep being compressed as before
+    """
+    samples = [
+        transcription.text
+        for transcription in db.query(Transcription)
+        .options(undefer(Transcription.text_zstd))
+        .order_by(Transcription.id.desc())
+        .limit(sample_size)
+        if transcription.text
+    ]
+    if len(samples) < MIN_DICTIONARY_SAMPLES:
+        logger.warning(
+            f"Not training a compression dictionary from {len(samples)} transcripts, "
+            f"at least {MIN_DICTIONARY_SAMPLES} are needed"
+        )
+        return None
+    try:
+        dictionary_data = train_dictionary(samples)
+    except zstandard.ZstdError as e:
+        logger.warning(f"Could not train a compression dictionary: {e}")
+        return None
+    dictionary_id = register_dictionary(dictionary_data)
+    if db.get(CompressionDictionary, dictionary_id) is None:
+        db.add(CompressionDictionary(id=dictionary_id, data=dictionary_data))
+        db.commit()
+    return dictionary_id
+
+
+def file_name_filter(file_name: str, match_full_file_name=False, match_case=False):
+    """Build the original_audio_filename condition used by GET /search."""
+    if match_full_file_name:
+        if match_case:
+            return Transcription.original_audio_filename == file_name
+        return func.lower(Transcription.original_audio_filename) == file_name.lower()
+    if match_case:
+        return Transcription.original_audio_filename.op("GLOB")(f"*{file_name}*")
+    return func.lower(Transcription.original_audio_filename).like(
+        f"%{file_name.lower()}%"
+    )
+
+
+def select_transcription_listing():
+    """
+    Core select of the columns shown in transcription listings, as plain tuples.
+    - Skips building ORM entities and parsing created_at into datetime objects,
+        SQLite stores it as "YYYY-MM-DD HH:MM:SS.ffffff" so it is turned into an
+        ISO 8601 string in the query itself
+    """
+    return select(
+        Transcription.id,
+        Transcription.audio_filepath,
+        Transcription.original_audio_filename,
+        Transcription.preview,
+        func.replace(type_coerce(Transcription.created_at, String), " ", "T").label(
+            "created_at"
+        ),
+    ).order_by(Transcription.id)
+
+
+def db_get_transcription_rows(db: Session = Depends(get_db)):
+    """Retrieve the listing columns of all transcriptions."""
+    return db.execute(select_transcription_listing()).all()
+
+
+def db_search_transcription_rows(
     file_name: str,
     match_full_file_name=False,
     match_case=False,
     db: Session = Depends(get_db),
 ):
-    """Search for transcriptions based on file name."""
-    query = db.query(Transcription)
-
-    if match_full_file_name:
-        if match_case:
-            query = query.filter(Transcription.original_audio_filename == file_name)
-        else:
-            query = query.filter(
-                func.lower(Transcription.original_audio_filename) == file_name.lower()
-            )
-    elif match_case:
-        query = query.filter(
-            Transcription.original_audio_filename.op("GLOB")(f"*{file_name}*")
+    """Search for the listing columns of transcriptions based on file name."""
+    return db.execute(
+        select_transcription_listing().where(
+            file_name_filter(file_name, match_full_file_name, match_case)
         )
-    else:
-        query = query.filter(
-            func.lower(Transcription.original_audio_filename).like(
-                f"%{file_name.lower()}%"
+    ).all()
+
+
+def db_get_transcription_rows_by_ids(
+    transcription_ids: list[int], db: Session = Depends(get_db)
+):
+    """Retrieve the listing columns of the given transcriptions, in the given order."""
+    rows = {
+        row[0]: row
+        for row in db.execute(
+            select_transcription_listing().where(
+                Transcription.id.in_(transcription_ids)
             )
         )
-
-    return query.all()
+    }
+    return [rows[i] for i in transcription_ids if i in rows]
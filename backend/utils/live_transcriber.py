@@ -0,0 +1,199 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from functools import partial
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from config import settings
+from log_config import logger
+from utils.transcriber import PROMPT_CHARACTERS, SAMPLE_RATE, acquire_model
+
+BYTES_PER_SAMPLE = 2  # 16-bit signed little-endian PCM
+
+
+class PcmRingBuffer:
+    """
+    Fixed capacity ring buffer of raw PCM bytes.
+    - Memory is allocated once, writes past capacity overwrite the oldest audio
+    - read() returns the buffered audio in chronological order
+    - discard() drops the oldest audio, so the buffer slides along the stream
+    """
+
+    def __init__(self, capacity: int):
+        self.buffer = bytearray(capacity)
+        self.capacity = capacity
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def free(self) -> int:
+        return self.capacity - self.size
+
+    def write(self, data: bytes) -> int:
+        """Append audio, returns the number of oldest bytes that were overwritten."""
+        overwritten = max(0, self.size + len(data) - self.capacity)
+        if len(data) >= self.capacity:
+            self.buffer[:] = data[-self.capacity :]
+            self.start = 0
+            self.size = self.capacity
+            return overwritten
+        end = (self.start + self.size) % self.capacity
+        first = min(len(data), self.capacity - end)
+        self.buffer[end : end + first] = data[:first]
+        self.buffer[: len(data) - first] = data[first:]
+        self.start = (self.start + overwritten) % self.capacity
+        self.size = min(self.capacity, self.size + len(data))
+        return overwritten
+
+    def read(self) -> bytes:
+        end = self.start + self.size
+        if end <= self.capacity:
+            return bytes(self.buffer[self.start : end])
+        return bytes(self.buffer[self.start :] + self.buffer[: end - self.capacity])
+
+    def discard(self, length: int) -> None:
+        length = min(length, self.size)
+        self.start = (self.start + length) % self.capacity
+        self.size -= length
+
+
+def pcm_to_audio(pcm: bytes) -> np.ndarray:
+    """Convert 16-bit PCM bytes into the float32 waveform expected by Whisper."""
+    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+class LiveTranscriber:
+    """
+    Incremental transcription of a live 16 kHz mono 16-bit PCM stream.
+    - Audio that is not committed yet is held in a PcmRingBuffer sized to one decoding
+        window
+    - Every settings.LIVE_STEP_SECONDS of new audio, the buffered audio is decoded in the
+        background and on_update is called with the transcript so far
+        - One decode runs at a time, steps that arrive meanwhile are not queued, the
+            next decode covers them with the newest audio so latency stays bounded
+    - Once a decode covers half of the window, its complete segments are committed and
+        the buffer is trimmed at the end of the last one
+        - The last segment may still be spoken, its audio stays in the buffer and
+            overlaps into the next decode
+        - The committed text is passed as initial_prompt, and the language detected in
+            the first decode is kept
+    - If decoding falls a whole window behind, the oldest audio is overwritten
+    - Without a model_instance, each decode checks one out with acquire_model, so an
+        idle live session does not hold a model away from batch transcriptions
+        - Live decodes may use the instances reserved by settings.LIVE_RESERVED_MODELS
+        - A partial decode is skipped when no instance is free within a step, the next
+            step decodes the newest audio instead
+    """
+
+    def __init__(
+        self,
+        on_update: Callable[[str], Awaitable[None]] | None = None,
+        model_instance: object = None,
+    ):
+        self.model = model_instance
+        self.on_update = on_update
+        self.window = PcmRingBuffer(
+            settings.STREAM_WINDOW_SECONDS * SAMPLE_RATE * BYTES_PER_SAMPLE
+        )
+        self.commit_bytes = self.window.capacity // 2
+        self.step_bytes = (
+            int(settings.LIVE_STEP_SECONDS * SAMPLE_RATE) * BYTES_PER_SAMPLE
+        )
+        self.pending_bytes = 0
+        self.overwritten = 0
+        self.options = {}
+        self.committed = []
+        self.hypothesis = ""
+        self.decoding: asyncio.Task | None = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.committed) + self.hypothesis
+
+    def _transcribe(self, audio, *, final: bool) -> dict | None:
+        if self.model is not None:
+            return self.model.transcribe(audio, **self.options)
+        # A partial that waited longer than a step is stale, skip it rather than queue
+        timeout = None if final else settings.LIVE_STEP_SECONDS
+        try:
+            with acquire_model(live=True, timeout=timeout) as model_instance:
+                return model_instance.transcribe(audio, **self.options)
+        except TimeoutError:
+            logger.debug("No model instance free, skipped a live partial decode")
+            return None
+
+    async def _decode(self, *, final: bool = False) -> None:
+        pcm = self.window.read()
+        overwritten = self.overwritten
+        self.pending_bytes = 0
+        result = await run_in_threadpool(
+            partial(self._transcribe, final=final), pcm_to_audio(pcm)
+        )
+        if result is None:
+            return
+        if result.get("language"):
+            self.options["language"] = result["language"]
+
+        if final or len(pcm) >= self.commit_bytes:
+            segments = result.get("segments") or []
+            boundary = len(pcm)
+            committed_text, self.hypothesis = result["text"], ""
+            if not final and len(segments) > 1:
+                segment_end = int(segments[-2]["end"] * SAMPLE_RATE) * BYTES_PER_SAMPLE
+                if segment_end > 0:
+                    boundary = segment_end
+                    committed_text = "".join(
+                        segment["text"] for segment in segments[:-1]
+                    )
+                    self.hypothesis = segments[-1]["text"]
+            self.committed.append(committed_text)
+            # Audio overwritten while decoding is already gone from the buffer
+            self.window.discard(max(0, boundary - (self.overwritten - overwritten)))
+            self.options["initial_prompt"] = "".join(self.committed)[
+                -PROMPT_CHARACTERS:
+            ]
+        else:
+            self.hypothesis = result["text"]
+
+        if self.on_update is not None and not final:
+            await self.on_update(self.text)
+
+    async def feed(self, pcm: bytes) -> None:
+        """
+        Add a frame of audio, starting a background decode once a step of new audio is
+        buffered and no decode is running.
+        """
+        if len(pcm) % BYTES_PER_SAMPLE:
+            msg = "PCM frames must contain whole 16-bit samples"
+            raise ValueError(msg)
+        if self.decoding is not None and self.decoding.done():
+            # Raise errors of the previous decode
+            self.decoding.result()
+
+        overwritten = self.window.write(pcm)
+        if overwritten:
+            self.overwritten += overwritten
+            logger.warning(
+                f"Live transcription fell behind, dropped {overwritten} bytes of audio"
+            )
+        self.pending_bytes += len(pcm)
+        if self.pending_bytes >= self.step_bytes and (
+            self.decoding is None or self.decoding.done()
+        ):
+            self.decoding = asyncio.create_task(self._decode())
+
+    async def finish(self) -> str:
+        """Decode the remaining audio and return the full transcript."""
+        if self.decoding is not None:
+            await self.decoding
+        if len(self.window):
+            await self._decode(final=True)
+        return self.text
+
+    def cancel(self) -> None:
+        """Stop the running decode, e.g. when the client disconnected."""
+        if self.decoding is not None:
+            self.decoding.cancel()
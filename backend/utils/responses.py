@@ -0,0 +1,52 @@
+from collections.abc import Sequence
+
+import orjson
+from fastapi.responses import JSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import Receive, Scope, Send
+
+TRANSCRIPTION_LISTING_FIELDS = (
+    "id",
+    "audio_filepath",
+    "original_audio_filename",
+    "preview",
+    "created_at",
+)
+# JSON endpoints whose responses are gzip compressed, audio downloads are not as they
+# are already compressed
+GZIP_PATH_PREFIXES = ("/api/transcriptions", "/api/search")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib json module."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+def transcription_rows_response(rows: Sequence[Sequence]) -> ORJSONResponse:
+    """
+    Shared encoder for transcription listings, used by GET /transcriptions and GET /search
+    - rows are plain tuples in TRANSCRIPTION_LISTING_FIELDS order, as selected by
+        backend/utils/db_operations.py > select_transcription_listing
+    - created_at is already an ISO formatted string, so rows are serialized as they are
+    """
+    return ORJSONResponse(
+        content=[
+            dict(zip(TRANSCRIPTION_LISTING_FIELDS, row, strict=True)) for row in rows
+        ],
+        status_code=200,
+    )
+
+
+class TranscriptionGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware limited to the JSON transcription endpoints in GZIP_PATH_PREFIXES
+    - Other requests, e.g. audio files served from /api/audio_storage, pass through
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(GZIP_PATH_PREFIXES):
+            await super().__call__(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
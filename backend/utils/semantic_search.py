@@ -0,0 +1,403 @@
+import argparse
+import fcntl
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal, init_db
+from log_config import logger
+from utils.db_operations import db_get_transcription_ids, db_get_transcription_texts
+
+CHUNK_OVERLAP_WORDS = 20
+SEARCH_BATCH_ROWS = 65536  # rows scored per matrix product, ~100 MB at 384 dimensions
+REINDEX_BATCH_SIZE = (
+    256  # transcripts embedded per batch by reindex_missing_transcriptions
+)
+RRF_K = 60  # reciprocal rank fusion constant
+
+
+def get_embedding_model():
+    """
+    Load and return the sentence embedding model, on CPU.
+    In tests, monkeypatch this function so that sentence-transformers is not imported.
+    """
+    if not hasattr(get_embedding_model, "model"):
+        # heavy dependency, only installed with the `semantic` extra
+        from sentence_transformers import SentenceTransformer
+
+        get_embedding_model.model = SentenceTransformer(
+            settings.EMBEDDING_MODEL, device="cpu"
+        )
+    return get_embedding_model.model
+
+
+def embed_texts(texts: list[str]) -> np.ndarray:
+    """Embed texts into unit length float32 vectors, so dot products are cosine scores."""
+    vectors = get_embedding_model().encode(
+        texts, batch_size=32, normalize_embeddings=True, convert_to_numpy=True
+    )
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def chunk_text(text: str, chunk_words: int | None = None) -> list[str]:
+    """Split a transcript into overlapping chunks of chunk_words words."""
+    chunk_words = chunk_words or settings.SEMANTIC_CHUNK_WORDS
+    words = text.split()
+    step = max(1, chunk_words - CHUNK_OVERLAP_WORDS)
+    return [
+        " ".join(words[start : start + chunk_words])
+        for start in range(0, max(1, len(words) - CHUNK_OVERLAP_WORDS), step)
+        if words[start : start + chunk_words]
+    ]
+
+
+class VectorIndex:
+    """
+    Append-only flat vector index stored in two files under `directory`:
+    - vectors.f32: one float32 row per chunk, memory-mapped for search
+    - ids.i64: the transcription id of each row
+    Rows are appended under an exclusive file lock, so that the server and the bulk
+    importer can add to the same index. Readers only use rows present in both files,
+    and an append first truncates both files to those rows, dropping what an
+    interrupted append left in one file only.
+    An optional IVF structure, written by build_ivf, narrows down the rows scored per
+    search on large indexes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.ids_path = os.path.join(directory, "ids.i64")
+        self.dimension_path = os.path.join(directory, "dimension")
+        self.ivf_pointer_path = os.path.join(directory, "ivf")
+        self.ivf = None
+        self.lock = threading.Lock()
+        self.vectors = None
+        self.ids = None
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def dimension(self) -> int | None:
+        if not os.path.exists(self.dimension_path):
+            return None
+        with open(self.dimension_path, encoding="utf-8") as dimension_file:
+            return int(dimension_file.read())
+
+    def __len__(self) -> int:
+        dimension = self.dimension
+        if dimension is None or not os.path.exists(self.ids_path):
+            return 0
+        return min(
+            os.path.getsize(self.vectors_path) // (dimension * 4),
+            os.path.getsize(self.ids_path) // 8,
+        )
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        """Append vectors and the transcription id of each of them."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        ids = np.ascontiguousarray(ids, dtype=np.int64)
+        with self.lock, open(self.vectors_path, "ab") as vectors_file:
+            fcntl.flock(vectors_file, fcntl.LOCK_EX)
+            try:
+                if self.dimension is None:
+                    with open(self.dimension_path, "w", encoding="utf-8") as file:
+                        file.write(str(vectors.shape[1]))
+                elif self.dimension != vectors.shape[1]:
+                    msg = f"Expected {self.dimension} dimensional vectors, got {vectors.shape[1]}"
+                    raise ValueError(msg)
+                rows = len(self)
+                vectors_file.truncate(rows * vectors.shape[1] * 4)
+                vectors_file.write(vectors.tobytes())
+                vectors_file.flush()
+                with open(self.ids_path, "ab") as ids_file:
+                    ids_file.truncate(rows * 8)
+                    ids_file.write(ids.tobytes())
+            finally:
+                fcntl.flock(vectors_file, fcntl.LOCK_UN)
+
+    def _mapped(self) -> tuple[np.ndarray, np.ndarray]:
+        """Memory-map the index, remapping only when rows were appended since."""
+        rows = len(self)
+        if self.ids is None or len(self.ids) != rows:
+            if rows == 0:
+                return np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=np.int64)
+            self.vectors = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(rows, self.dimension),
+            )
+            self.ids = np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(rows,))
+        return self.vectors, self.ids
+
+    def indexed_ids(self) -> set[int]:
+        """Return the ids of the transcriptions that have at least one indexed chunk."""
+        _, ids = self._mapped()
+        return set(np.unique(ids).tolist())
+
+    def _load_ivf(self) -> dict | None:
+        """Load the IVF structure written by build_ivf, reloading it after a rebuild."""
+        if not os.path.exists(self.ivf_pointer_path):
+            return None
+        with open(self.ivf_pointer_path, encoding="utf-8") as pointer:
+            ivf_directory = os.path.join(self.directory, pointer.read())
+        if self.ivf is None or self.ivf["directory"] != ivf_directory:
+            centroids = np.load(os.path.join(ivf_directory, "centroids.npy"))
+            offsets = np.load(os.path.join(ivf_directory, "offsets.npy"))
+            rows = int(offsets[-1])
+            self.ivf = {
+                "directory": ivf_directory,
+                "centroids": centroids,
+                "offsets": offsets,
+                "vectors": np.memmap(
+                    os.path.join(ivf_directory, "vectors.f32"),
+                    dtype=np.float32,
+                    mode="r",
+                    shape=(rows, centroids.shape[1]),
+                ),
+                "ids": np.memmap(
+                    os.path.join(ivf_directory, "ids.i64"),
+                    dtype=np.int64,
+                    mode="r",
+                    shape=(rows,),
+                ),
+            }
+        return self.ivf
+
+    def build_ivf(
+        self, n_lists: int | None = None, sample_size: int = 65536, iterations: int = 10
+    ) -> int:
+        """
+        Build an inverted file (IVF) structure over the rows indexed so far.
+        - k-means on a sample of rows gives n_lists centroids, every row is then stored
+            again, grouped by its closest centroid, so that a search only scans the lists
+            of the centroids closest to the query
+        - Rows appended after the build are still scanned in full until the next build
+        - Returns the number of rows covered
+        """
+        vectors, ids = self._mapped()
+        rows = len(ids)
+        if not rows:
+            return 0
+        rng = np.random.default_rng(0)
+        sample = np.asarray(
+            vectors[np.sort(rng.choice(rows, min(rows, sample_size), replace=False))]
+        )
+        n_lists = min(len(sample), n_lists or max(1, int(np.sqrt(rows))))
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty lists keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        assignments = np.concatenate(
+            [
+                np.argmax(
+                    vectors[start : start + SEARCH_BATCH_ROWS] @ centroids.T, axis=1
+                )
+                for start in range(0, rows, SEARCH_BATCH_ROWS)
+            ]
+        )
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+
+        ivf_name = f"ivf-{rows}-{time.time_ns()}"
+        ivf_directory = os.path.join(self.directory, ivf_name)
+        os.makedirs(ivf_directory)
+        np.save(os.path.join(ivf_directory, "centroids.npy"), centroids)
+        np.save(os.path.join(ivf_directory, "offsets.npy"), offsets)
+        with (
+            open(os.path.join(ivf_directory, "vectors.f32"), "wb") as vectors_file,
+            open(os.path.join(ivf_directory, "ids.i64"), "wb") as ids_file,
+        ):
+            for start in range(0, rows, SEARCH_BATCH_ROWS):
+                batch = order[start : start + SEARCH_BATCH_ROWS]
+                vectors_file.write(np.asarray(vectors[batch]).tobytes())
+                ids_file.write(np.asarray(ids[batch]).tobytes())
+
+        # Swap the pointer atomically, readers reload on their next search
+        previous = self._load_ivf()
+        pointer_tmp = f"{self.ivf_pointer_path}.tmp"
+        with open(pointer_tmp, "w", encoding="utf-8") as pointer:
+            pointer.write(ivf_name)
+        os.replace(pointer_tmp, self.ivf_pointer_path)
+        if previous is not None:
+            shutil.rmtree(previous["directory"], ignore_errors=True)
+        return rows
+
+    def search(
+        self, query: np.ndarray, top_k: int, n_probe: int | None = None
+    ) -> list[tuple[int, float]]:
+        """
+        Return the top_k transcriptions by their best chunk score, as
+        (transcription_id, score).
+        - Without an IVF structure every chunk is scored with batched dot products
+        - With one, only the n_probe lists closest to the query are scored, plus the
+            rows appended since it was built
+        """
+        vectors, ids = self._mapped()
+        if not len(ids):
+            return []
+        query = np.ascontiguousarray(query, dtype=np.float32)
+        # Keep more chunks than transcriptions needed, as one transcript has many chunks
+        keep = top_k * 8
+        candidates = []
+
+        flat_start = 0
+        ivf = self._load_ivf()
+        if ivf is not None:
+            offsets = ivf["offsets"]
+            n_probe = min(len(offsets) - 1, n_probe or settings.SEMANTIC_IVF_PROBES)
+            probes = np.argpartition(ivf["centroids"] @ query, -n_probe)[-n_probe:]
+            for probe in probes:
+                start, end = offsets[probe], offsets[probe + 1]
+                candidates.append(
+                    _top_candidates(
+                        ivf["vectors"][start:end], ivf["ids"][start:end], query, keep
+                    )
+                )
+            flat_start = int(offsets[-1])
+
+        for start in range(flat_start, len(ids), SEARCH_BATCH_ROWS):
+            end = start + SEARCH_BATCH_ROWS
+            candidates.append(
+                _top_candidates(vectors[start:end], ids[start:end], query, keep)
+            )
+
+        candidate_ids = np.concatenate([c[0] for c in candidates])
+        candidate_scores = np.concatenate([c[1] for c in candidates])
+        results = {}
+        for row in np.argsort(candidate_scores)[::-1]:
+            transcription_id = int(candidate_ids[row])
+            if transcription_id not in results:
+                results[transcription_id] = float(candidate_scores[row])
+                if len(results) == top_k:
+                    break
+        return list(results.items())
+
+
+def _top_candidates(
+    vectors: np.ndarray, ids: np.ndarray, query: np.ndarray, keep: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Score a contiguous block of rows and keep its `keep` best (ids, scores)."""
+    scores = vectors @ query
+    if len(scores) > keep:
+        top = np.argpartition(scores, -keep)[-keep:]
+        return np.asarray(ids[top]), scores[top]
+    return np.asarray(ids), scores
+
+
+def get_vector_index() -> VectorIndex:
+    """Return the process wide vector index stored at settings.VECTOR_INDEX_PATH."""
+    if not hasattr(get_vector_index, "index"):
+        get_vector_index.index = VectorIndex(settings.VECTOR_INDEX_PATH)
+    return get_vector_index.index
+
+
+def index_transcriptions(transcriptions: list[tuple[int, str]]) -> None:
+    """Chunk, embed and index (transcription_id, text) pairs in one embedding batch."""
+    ids = []
+    chunks = []
+    for transcription_id, text in transcriptions:
+        text_chunks = chunk_text(text or "")
+        ids.extend([transcription_id] * len(text_chunks))
+        chunks.extend(text_chunks)
+    if chunks:
+        get_vector_index().add(np.array(ids), embed_texts(chunks))
+
+
+def index_saved_transcriptions(transcriptions: list[tuple[int, str]]) -> None:
+    """
+    Index transcripts right after they are saved, when settings.SEMANTIC_SEARCH is enabled
+    - Errors are logged instead of raised, so that semantic search never stops a
+        transcription from being saved and reported. Transcripts left out are picked up
+        by `python -m utils.semantic_search --reindex`
+    """
+    if not settings.SEMANTIC_SEARCH:
+        return
+    try:
+        index_transcriptions(transcriptions)
+    except Exception as e:
+        transcription_ids = [transcription_id for transcription_id, _ in transcriptions]
+        logger.error(
+            f"Failed to index transcriptions {transcription_ids} for semantic search: {e}"
+        )
+
+
+def reindex_missing_transcriptions(
+    db: Session, batch_size: int = REINDEX_BATCH_SIZE
+) -> int:
+    """
+    Index the transcriptions saved in the database that have no chunk in the vector
+    index, e.g. imported before SEMANTIC_SEARCH was enabled or left out by an indexing
+    error. Returns the number of transcriptions embedded.
+    """
+    indexed = get_vector_index().indexed_ids()
+    missing = [
+        transcription_id
+        for transcription_id in db_get_transcription_ids(db=db)
+        if transcription_id not in indexed
+    ]
+    for start in range(0, len(missing), batch_size):
+        index_transcriptions(
+            db_get_transcription_texts(missing[start : start + batch_size], db=db)
+        )
+        logger.info(
+            f"Reindex: {min(start + batch_size, len(missing))}/{len(missing)} "
+            "transcriptions embedded"
+        )
+    return len(missing)
+
+
+def semantic_search(query: str, top_k: int = 50) -> list[int]:
+    """Return the ids of the transcriptions closest in meaning to the query."""
+    results = get_vector_index().search(embed_texts([query])[0], top_k)
+    return [transcription_id for transcription_id, _ in results]
+
+
+def hybrid_rank(*rankings: list[int]) -> list[int]:
+    """Merge ranked id lists with reciprocal rank fusion."""
+    scores = {}
+    for ranking in rankings:
+        for rank, transcription_id in enumerate(ranking):
+            scores[transcription_id] = scores.get(transcription_id, 0) + 1 / (
+                RRF_K + rank + 1
+            )
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Build the IVF structure of the semantic search vector index."
+    )
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="First embed the transcriptions in the database that are not indexed yet",
+    )
+    parser.add_argument(
+        "--lists",
+        type=int,
+        default=None,
+        help="Number of IVF lists, defaults to the square root of the number of chunks",
+    )
+    args = parser.parse_args(argv)
+    if args.reindex:
+        init_db()
+        with SessionLocal() as db:
+            reindexed = reindex_missing_transcriptions(db)
+        logger.info(f"Indexed {reindexed} missing transcriptions")
+    rows = get_vector_index().build_ivf(n_lists=args.lists)
+    logger.info(f"Built IVF structure over {rows} chunks")
+
+
+if __name__ == "__main__":
+    main()
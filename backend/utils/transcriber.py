@@ -11,7 +11,14 @@ from config import settings
 from database import get_db
 from log_config import logger
 from utils.db_operations import db_save_transcription
+from utils.semantic_search import index_saved_transcriptions
 from utils.websocket_manager import get_websockets
+from utils.worker_runtime import ModelPool, get_worker_plan
+
+SUPPORTED_AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a")
+SAMPLE_RATE = 16000  # Whisper models expect 16 kHz audio
+# Transcript tail passed as the next window's prompt, Whisper keeps about 224 tokens
+PROMPT_CHARACTERS = 1000
 
 
 async def transcribe_files(
@@ -63,34 +70,62 @@ async def process_transcription_batch(
 ):
     """
     - Worker threads called with this function will process the audio file through
-        transcribe_audio function
-    - Once transcript is returned, save the transcript using db_save_transcription function
+        iter_transcribe_windows function
+        - Each file is transcribed with a model instance checked out from model_pool, so
+            parallel batches do not share one model
+    - Each decoded window is sent out as soon as it is ready, so that text shows up
+        before a long recording is fully transcribed
+        - Status = partial, with the window's text
+    - Once the whole file is transcribed, save the consolidated transcript using
+        db_save_transcription function
+        - When settings.SEMANTIC_SEARCH is enabled, the transcript is also chunked and
+            embedded into the vector index used by GET /search?mode=semantic, an
+            indexing error is logged and does not stop the batch
     - Send out a notification that an audio file has been processed by whisper
-        - Status = completed
+        - Status = completed, with the consolidated text
+    - partial and completed messages carry a sequence number that increases monotonically
+        across the whole batch
     - Move on to the next audio file to process
     - For replying, there are different return statuses for single or batch jobs:
         - Single Audio File Upload: Status = job_completed
         - Batch Audio File Upload: Status = batch_completed
     """
     results = []
+    sequence = 0
     for file_path, original_audio_name in zip(
         file_paths, original_audio_names, strict=False
     ):
-        transcribed_text = transcribe_audio(file_path)
-        db_save_transcription(file_path, original_audio_name, transcribed_text, db)
+        segments = []
+        for segment_text in iter_transcribe_windows(file_path):
+            segments.append(segment_text)
+            sequence += 1
+            await notify_websockets(
+                batch_uuid,
+                {
+                    "status": "partial",
+                    "sequence": sequence,
+                    "file": original_audio_name,
+                    "text": segment_text,
+                },
+            )
+
+        transcribed_text = "".join(segments)
+        transcription = db_save_transcription(
+            file_path, original_audio_name, transcribed_text, db
+        )
+        index_saved_transcriptions([(transcription.id, transcribed_text)])
         results.append({"file": original_audio_name})
         # Notify connected WebSocket clients about the completed transcription
-        for websocket in get_websockets(batch_uuid):
-            try:
-                await websocket.send_json(
-                    {
-                        "status": "completed",
-                        "file": original_audio_name,
-                        "text": transcribed_text,
-                    }
-                )
-            except Exception as e:
-                logger.error(f"Failed to send message over WebSocket: {e}")
+        sequence += 1
+        await notify_websockets(
+            batch_uuid,
+            {
+                "status": "completed",
+                "sequence": sequence,
+                "file": original_audio_name,
+                "text": transcribed_text,
+            },
+        )
 
     if len(file_paths) > 1:
         for websocket in get_websockets(batch_uuid):
@@ -118,20 +153,66 @@ async def process_transcription_batch(
                 )
 
 
+async def notify_websockets(batch_uuid: str, message: dict) -> None:
+    """Send a message to every WebSocket client connected for the batch."""
+    for websocket in get_websockets(batch_uuid):
+        try:
+            await websocket.send_json(message)
+        except Exception as e:
+            logger.error(f"Failed to send message over WebSocket: {e}")
+
+
+def load_model():
+    """
+    Load a new instance of the Whisper model.
+    In tests, monkeypatch this function (or have it return a dummy object)
+    so that the openai-whisper library is not actually imported.
+    """
+    import whisper  # heavy dependency, only imported when needed
+
+    return whisper.load_model(settings.WHISPER_MODEL)
+
+
 def get_model():
     """
     Load and return the Whisper model.
     In production, this function loads the heavy model.
     In tests, monkeypatch this function (or have it return a dummy object)
     so that the openai-whisper library is not actually imported.
+    - Single process callers, e.g. bulk import workers, use this one instance
+    - The server checks out instances from model_pool through acquire_model instead
     """
     if not hasattr(get_model, "model"):
-        import whisper  # heavy dependency, only imported when needed
-
-        get_model.model = whisper.load_model(settings.WHISPER_MODEL)
+        get_model.model = load_model()
     return get_model.model
 
 
+def create_model_pool() -> ModelPool:
+    """
+    Pool of Whisper model instances, loaded on demand.
+    - Sized by backend/utils/worker_runtime.py > get_worker_plan
+    - settings.LIVE_RESERVED_MODELS instances are kept for live transcription
+    """
+    return ModelPool(
+        lambda: load_model(),  # noqa: PLW0108 looked up per call, so tests can monkeypatch it
+        lambda: get_worker_plan().workers,
+        lambda: settings.LIVE_RESERVED_MODELS,
+    )
+
+
+model_pool = create_model_pool()
+
+
+def acquire_model(*, live: bool = False, timeout: float | None = None):
+    """
+    Check out a Whisper model instance for the calling thread, as a context manager.
+    - Blocks while every instance the available memory allows is in use, or raises
+        TimeoutError after timeout seconds
+    - live callers may also use the instances reserved for live transcription
+    """
+    return model_pool.acquire(reserved=live, timeout=timeout)
+
+
 def transcribe_audio(file_path: str, model_instance: object = None) -> str:
     """
     Task 2b i and Task 2b ii: Use the openai/whisper-tiny model from Hugging Face.
@@ -149,3 +230,57 @@ def transcribe_audio(file_path: str, model_instance: object = None) -> str:
         model_instance = get_model()
     result = model_instance.transcribe(file_path)
     return result["text"]
+
+
+def load_audio(file_path: str):
+    """
+    Decode an audio file into a 16 kHz mono waveform.
+    In tests, monkeypatch this function so that the openai-whisper library and ffmpeg
+    are not required.
+    """
+    import whisper  # heavy dependency, only imported when needed
+
+    return whisper.load_audio(file_path)
+
+
+def iter_transcribe_windows(file_path: str, model_instance: object = None):
+    """
+    Transcribe audio from the given file path one window at a time, yielding the text of
+    each window as soon as it is decoded.
+    - Window length is settings.STREAM_WINDOW_SECONDS, Whisper's native window is 30 seconds
+    - Windows are aligned on segment boundaries, like Whisper's own seek over a file
+        - The last segment of a window may be cut by the window end, so it is dropped
+            and the next window starts where the previous complete segment ended
+        - The transcript so far is passed as initial_prompt, and the language detected
+            in the first window is kept for the following ones
+    - Joining every yielded text gives the full transcript of the file
+    - Without a model_instance, one is held from acquire_model until the file is done
+    """
+    if model_instance is None:
+        with acquire_model() as pooled_model:
+            yield from iter_transcribe_windows(file_path, pooled_model)
+        return
+    audio = load_audio(file_path)
+    window_samples = settings.STREAM_WINDOW_SECONDS * SAMPLE_RATE
+    options = {}
+    prompt = ""
+    start = 0
+    while start < len(audio):
+        result = model_instance.transcribe(
+            audio[start : start + window_samples], **options
+        )
+        segments = result.get("segments") or []
+        next_start = start + window_samples
+        text = result["text"]
+        if next_start < len(audio) and len(segments) > 1:
+            resume_at = start + int(segments[-2]["end"] * SAMPLE_RATE)
+            if resume_at > start:
+                next_start = resume_at
+                text = "".join(segment["text"] for segment in segments[:-1])
+        yield text
+
+        start = next_start
+        prompt = (prompt + text)[-PROMPT_CHARACTERS:]
+        options["initial_prompt"] = prompt
+        if result.get("language"):
+            options["language"] = result["language"]
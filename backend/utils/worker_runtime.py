@@ -0,0 +1,223 @@
+import os
+import sys
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from config import settings
+from log_config import logger
+
+# Approximate memory used by one loaded Whisper model, per openai/whisper's README
+WHISPER_MODEL_MEMORY_MB = {
+    "tiny": 1024,
+    "base": 1024,
+    "small": 2048,
+    "medium": 5120,
+    "large": 10240,
+    "turbo": 6144,
+}
+# Memory left to the server, the database and audio decoding
+RESERVED_MEMORY_MB = 1024
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+@dataclass(frozen=True)
+class WorkerPlan:
+    workers: int
+    threads: int
+    cpus: int
+    available_memory_mb: int
+    model_memory_mb: int
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, which respects taskset and container cpusets."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def available_memory_mb() -> int:
+    """Available memory, capped by the cgroup memory limit when running in a container."""
+    available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+    try:
+        with open("/sys/fs/cgroup/memory.max", encoding="utf-8") as limit_file:
+            limit = limit_file.read().strip()
+        if limit != "max":
+            with open("/sys/fs/cgroup/memory.current", encoding="utf-8") as used_file:
+                used = int(used_file.read())
+            available = min(available, int(limit) - used)
+    except (OSError, ValueError):
+        pass
+    return max(0, available // (1024 * 1024))
+
+
+def model_memory_mb() -> int:
+    """Memory budget of one model instance, settings.MODEL_MEMORY_MB or an estimate."""
+    if settings.MODEL_MEMORY_MB:
+        return settings.MODEL_MEMORY_MB
+    name = settings.WHISPER_MODEL.split(".")[0]
+    return WHISPER_MODEL_MEMORY_MB.get(
+        name.split("-")[0], WHISPER_MODEL_MEMORY_MB["large"]
+    )
+
+
+def plan_workers(
+    cpus: int,
+    memory_mb: int,
+    per_model_mb: int,
+    workers: int = 0,
+    threads: int = 0,
+) -> WorkerPlan:
+    """
+    Size the number of model instances and the threads each of them uses.
+    - Without explicit workers, run as many instances as fit in memory, at most one
+        per CPU
+    - Without explicit threads, split the CPUs between the instances, so that
+        workers x threads matches the CPU count instead of every instance using them all
+    """
+    if not workers:
+        fits_in_memory = (memory_mb - RESERVED_MEMORY_MB) // max(1, per_model_mb)
+        workers = max(1, min(cpus, fits_in_memory))
+    threads = threads or max(1, cpus // workers)
+    return WorkerPlan(workers, threads, cpus, memory_mb, per_model_mb)
+
+
+def get_worker_plan() -> WorkerPlan:
+    """Return the process wide plan, computed from the resources seen at first use."""
+    if not hasattr(get_worker_plan, "plan"):
+        get_worker_plan.plan = plan_workers(
+            available_cpus(),
+            available_memory_mb(),
+            model_memory_mb(),
+            settings.MODEL_WORKERS,
+            settings.MODEL_THREADS,
+        )
+    return get_worker_plan.plan
+
+
+def set_worker_plan(plan: WorkerPlan) -> None:
+    """Use `plan` in this process, e.g. in a worker process sized by its parent."""
+    get_worker_plan.plan = plan
+
+
+def set_torch_threads(threads: int) -> None:
+    """
+    Set torch's intra-op thread count, if torch has been imported.
+    - With the OpenMP backend this applies to the calling thread's parallel regions, so
+        each worker thread calls it before using a model
+    """
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.get_num_threads() != threads:
+        torch.set_num_threads(threads)
+
+
+def pin_threads(threads: int) -> None:
+    """
+    Limit the threads used by torch and the OpenMP / BLAS runtimes of this process.
+    - Environment variables only apply to runtimes loaded afterwards, so this runs
+        before numpy and torch are imported: at the top of main.py, and in the bulk
+        importer before its worker processes are spawned
+    """
+    for env_var in THREAD_ENV_VARS:
+        os.environ[env_var] = str(threads)
+    set_torch_threads(threads)
+
+
+def configure_worker_runtime() -> WorkerPlan:
+    """Pin thread counts for this process and report the chosen configuration."""
+    plan = get_worker_plan()
+    pin_threads(plan.threads)
+    logger.info(
+        f"Worker runtime: {plan.workers} model instance(s) x {plan.threads} thread(s) "
+        f"on {plan.cpus} CPU(s), {plan.model_memory_mb} MB per model with "
+        f"{plan.available_memory_mb} MB available, "
+        f"{min(settings.LIVE_RESERVED_MODELS, plan.workers - 1)} reserved for live "
+        "transcription"
+    )
+    return plan
+
+
+class ModelPool:
+    """
+    Bounded pool of model instances shared by worker threads.
+    - Instances are created lazily with `factory`, up to `size` of them
+    - A thread holds an instance exclusively between acquire and release, other threads
+        wait for one to be released instead of sharing it
+    - `reserved` instances are kept for acquire(reserved=True), e.g. live transcription,
+        so that long batch transcriptions cannot hold every instance. At least one
+        instance is always left to the other callers
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], object],
+        size: Callable[[], int],
+        reserved: Callable[[], int] = lambda: 0,
+    ):
+        self.factory = factory
+        self.size = size
+        self.reserved = reserved
+        self.idle = []
+        self.created = 0
+        self.shared_in_use = 0
+        self.condition = threading.Condition()
+
+    def _available(self, *, reserved: bool) -> bool:
+        size = self.size()
+        if not reserved:
+            shared_size = size - min(self.reserved(), size - 1)
+            if self.shared_in_use >= shared_size:
+                return False
+        return bool(self.idle) or self.created < size
+
+    @contextmanager
+    def acquire(
+        self, *, reserved: bool = False, timeout: float | None = None
+    ) -> Iterator[object]:
+        """
+        Check out an instance, waiting at most timeout seconds for one to be free.
+        - Raises TimeoutError when no instance was free in time
+        """
+        with self.condition:
+            if not self.condition.wait_for(
+                lambda: self._available(reserved=reserved), timeout
+            ):
+                msg = "No model instance available"
+                raise TimeoutError(msg)
+            model = self.idle.pop() if self.idle else None
+            if model is None:
+                self.created += 1
+            if not reserved:
+                self.shared_in_use += 1
+
+        try:
+            if model is None:
+                model = self.factory()
+        except BaseException:
+            with self.condition:
+                self.created -= 1
+                if not reserved:
+                    self.shared_in_use -= 1
+                self.condition.notify_all()
+            raise
+
+        set_torch_threads(get_worker_plan().threads)
+        try:
+            yield model
+        finally:
+            with self.condition:
+                self.idle.append(model)
+                if not reserved:
+                    self.shared_in_use -= 1
+                self.condition.notify_all()
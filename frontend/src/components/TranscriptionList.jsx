@@ -8,6 +8,7 @@ const TranscriptionList = () => {
     const [searchTerm, setSearchTerm] = useState('');
     const [matchFullFileName, setMatchFullFileName] = useState(false);
     const [matchCase, setMatchCase] = useState(false);
+    const [fullTexts, setFullTexts] = useState({});
 
     // Function to fetch all transcriptions
     const fetchTranscriptions = async () => {
@@ -50,6 +51,22 @@ const TranscriptionList = () => {
         }
     };
 
+    // Function to fetch the full text of a single transcription
+    const fetchFullText = async (id) => {
+        /*
+        Assumptions:
+        - Listings only contain a preview of each transcript, the full transcript is
+            fetched on demand from GET /transcriptions/{id}
+        */
+        try {
+            const response = await fetch(`${config.apiBaseUrl}/transcriptions/${id}`);
+            const data = await response.json();
+            setFullTexts((prev) => ({ ...prev, [id]: data.text }));
+        } catch (error) {
+            console.error("Error fetching transcription:", error);
+        }
+    };
+
     useEffect(() => {
         // Fetch all transcriptions on component mount
         fetchTranscriptions();
@@ -158,7 +175,15 @@ const TranscriptionList = () => {
                             </tr>
                             <tr>
                                 <td colSpan="3" className="border-b border-gray-600 p-3">
-                                    <p>{transcription.text}</p>
+                                    <p>{fullTexts[transcription.id] ?? transcription.preview}</p>
+                                    {fullTexts[transcription.id] === undefined && transcription.preview?.endsWith('...') && (
+                                        <button
+                                            onClick={() => fetchFullText(transcription.id)}
+                                            className="mt-2 text-blue-400 hover:text-blue-300"
+                                        >
+                                            Show full transcript
+                                        </button>
+                                    )}
                                 </td>
                             </tr>
                             <tr>
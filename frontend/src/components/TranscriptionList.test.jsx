@@ -6,6 +6,8 @@ Tests:
 
 - fetches and displays transcriptions on initial load: Validates that transcriptions are successfully fetched and displayed.
 
+- fetches the full transcript of a truncated preview: Validates that the full text is fetched per id and replaces the preview.
+
 - handles search functionality: Tests the search feature and fetch calls with a search term.
 
 - handles search with match case and full file name toggles: Verifies the correct search parameters are sent when toggles are used.
@@ -34,14 +36,14 @@ describe('TranscriptionList', () => {
             id: 1,
             original_audio_filename: 'test1.m4a',
             created_at: '2023-01-01T12:00:00Z',
-            text: 'This is test transcription 1',
+            preview: 'This is test transcription 1',
             audio_filepath: '/audio/test1.m4a'
         },
         {
             id: 2,
             original_audio_filename: 'test2.m4a',
             created_at: '2023-01-02T12:00:00Z',
-            text: 'This is test transcription 2',
+            preview: 'This is test transcription 2...',
             audio_filepath: '/audio/test2.m4a'
         }
     ];
@@ -79,7 +81,33 @@ describe('TranscriptionList', () => {
             expect(screen.getByText('test1.m4a')).toBeInTheDocument();
             expect(screen.getByText('test2.m4a')).toBeInTheDocument();
             expect(screen.getByText('This is test transcription 1')).toBeInTheDocument();
-            expect(screen.getByText('This is test transcription 2')).toBeInTheDocument();
+            expect(screen.getByText('This is test transcription 2...')).toBeInTheDocument();
+        });
+    });
+
+    test('fetches the full transcript of a truncated preview', async () => {
+        await act(async () => {
+            render(<TranscriptionList />);
+        });
+
+        // Only the truncated preview offers to load the full transcript
+        const showFullButtons = screen.getAllByText('Show full transcript');
+        expect(showFullButtons).toHaveLength(1);
+
+        // Mock the single transcription response
+        global.fetch.mockResolvedValueOnce({
+            ok: true,
+            json: async () => ({ ...mockTranscriptions[1], text: 'This is test transcription 2 in full' })
+        });
+
+        await act(async () => {
+            fireEvent.click(showFullButtons[0]);
+        });
+
+        expect(global.fetch).toHaveBeenCalledWith('http://localhost:9090/api/transcriptions/2');
+        await waitFor(() => {
+            expect(screen.getByText('This is test transcription 2 in full')).toBeInTheDocument();
+            expect(screen.queryByText('Show full transcript')).not.toBeInTheDocument();
         });
     });
 